@@ -4,17 +4,15 @@ import json
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import URL
+from sqlalchemy import text
 from dotenv import load_dotenv
 import bcrypt
-from openai import OpenAI
+from db import create_router, BIDDER_TABLE, TENDER_TABLE
+from rfq import client
+import jobs
+from offer_scoring import rank_user_offers
+import charts
 import streamlit.components.v1 as components
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests, re
-from bs4 import BeautifulSoup
 import imaplib, email, re
 # if "username" not in st.session_state:
 #     st.session_state["username"] = "Guest"
@@ -37,8 +35,9 @@ def fetch_recent_emails(limit=5):
     password = os.getenv("SENDER_PASSWORD")
 
     try:
-        # Gmail için
-        mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
+        # Varsayılan Gmail; yük testinde IMAP_HOST/IMAP_PORT/IMAP_SSL ile yerel sahte sunucuya yönlenir
+        imap_cls = imaplib.IMAP4_SSL if os.getenv("IMAP_SSL", "1") == "1" else imaplib.IMAP4
+        mail = imap_cls(os.getenv("IMAP_HOST", "imap.gmail.com"), int(os.getenv("IMAP_PORT", "993")))
         mail.login(user, password)
         mail.select("inbox")
 
@@ -73,175 +72,37 @@ def fetch_recent_emails(limit=5):
 load_dotenv()
 
 # ---------------- DB SETTINGS ----------------
-DB_USER = os.getenv("DB_USER", "postgres").strip()
-DB_PASS = os.getenv("DB_PASS", "").strip()
-DB_HOST = os.getenv("DB_HOST", "127.0.0.1").strip()
-DB_PORT = os.getenv("DB_PORT", "5432").strip()
-DB_NAME = os.getenv("DB_NAME", "postgres").strip()
-BIDDER_TABLE = os.getenv("TABLE_NAME_BIDDER", "bidder_list").strip()
-TENDER_TABLE = os.getenv("TABLE_NAME_TENDER", "tender_data").strip()
-
-DB_URL = URL.create(
-    drivername="postgresql+psycopg2",
-    username=DB_USER,
-    password=DB_PASS,
-    host=DB_HOST,
-    port=int(DB_PORT),
-    database=DB_NAME
-)
-
 @st.cache_resource
-def get_engine():
-    return create_engine(DB_URL, pool_pre_ping=True)
-
-engine = get_engine()
-
-# ---------------- OPENAI SETTINGS ----------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def get_router():
+    return create_router()
 
-def ai_extract_filters(query_text):
-    prompt = f"""
-    Analyze the user's supplier search request and output JSON with:
-    - buyer_country: 2-letter ISO code or null
-    - bidder_country: 2-letter ISO code or null
-    - year_min: integer or null
-    - year_max: integer or null
-    - max_price: number in USD or null
-    - product_keywords: keywords for tender_title
+router = get_router()
+# Yazmalar ve read-your-writes gereken okumalar (auth, offers) primary'de kalır;
+# Bidder List, analitik ve tedarikçi arama okuma engine'lerine (replica ya da primary-read) gider.
+engine = router.writer()
 
-    Only output valid JSON. No explanations.
-
-    Query: "{query_text}"
-    """
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        raw_text = response.choices[0].message.content.strip()
-        json_match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-        if not json_match:
-            st.error("No JSON found in AI output")
-            return None
-        return json.loads(json_match.group(0))
-    except Exception as e:
-        st.error(f"AI parsing failed: {e}")
-        return None
-
-def find_suppliers(filters):
-    def run_query(use_keywords=True, use_maxprice=True, use_bidder_country=True, use_years=True):
-        where_clauses, params = [], {}
-
-        if filters.get("buyer_country"):
-            where_clauses.append("buyer_country = :buyer_country")
-            params["buyer_country"] = filters["buyer_country"]
-
-        if use_bidder_country and filters.get("bidder_country"):
-            where_clauses.append("bidder_country = :bidder_country")
-            params["bidder_country"] = filters["bidder_country"]
-
-        if use_years and filters.get("year_min"):
-            where_clauses.append("tender_year >= :ymin")
-            params["ymin"] = filters["year_min"]
-        if use_years and filters.get("year_max"):
-            where_clauses.append("tender_year <= :ymax")
-            params["ymax"] = filters["year_max"]
-
-        if use_maxprice and filters.get("max_price"):
-            where_clauses.append('"tender_finalpriceUsd" <= :max_price')
-            params["max_price"] = filters["max_price"]
-
-        if use_keywords and filters.get("product_keywords"):
-            where_clauses.append("tender_title ILIKE :keywords")
-            params["keywords"] = f"%{filters['product_keywords']}%"
-
-        where_sql = " AND ".join(where_clauses)
-        if where_sql:
-            where_sql = "WHERE " + where_sql
-
-        query = f"""
-            SELECT
-                bidder_name,
-                bidder_country,
-                bidder_email,
-                bidder_phone,
-                bidder_url,
-                "bidder_contactName",
-                COUNT(*) AS tender_count,
-                AVG("tender_finalpriceUsd") AS avg_price
-            FROM {TENDER_TABLE}
-            {where_sql}
-            GROUP BY bidder_name, bidder_country, bidder_email, bidder_phone, bidder_url, "bidder_contactName"
-            ORDER BY tender_count DESC
-            LIMIT 10;
-        """
-        with engine.connect() as conn:
-            return pd.read_sql(text(query), conn, params=params)
-
-    # 🔹 Fallback zinciri (kaybolmuştu, geri ekleniyor)
-    df = run_query(True, True, True, True)
-    if not df.empty:
-        return df
-    st.info("No exact match. Relaxing keyword filter...")
-    df = run_query(False, True, True, True)
-    if not df.empty:
-        return df
-    st.info("Still no match. Ignoring max price...")
-    df = run_query(False, False, True, True)
-    if not df.empty:
-        return df
-    st.info("Still no match. Allowing foreign suppliers...")
-    df = run_query(False, False, False, True)
-    if not df.empty:
-        return df
-    st.info("Still no match. Removing year restriction...")
-    return run_query(False, False, False, False)
-
-def summarize_industry(bidder_name, bidder_url=None):
-    """AI ile şirketin sektörünü / faaliyetini özetler"""
-    query_text = f"Company name: {bidder_name}. "
-    if bidder_url:
-        query_text += f"Website: {bidder_url}. "
-    query_text += "Please summarize briefly which industry this company operates in and what it does."
+# Geliştirme için worker'ı uygulama süreci içinde çalıştırmak: RFQ_EMBEDDED_WORKER=1
+@st.cache_resource
+def get_embedded_worker():
+    return jobs.start_background_worker(router)
 
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": query_text}],
-            temperature=0.2
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception:
-        return "Industry information not available."
-def send_email_smtp(to_emails, subject, body):
-    sender_email = os.getenv("SENDER_EMAIL")
-    sender_password = os.getenv("SENDER_PASSWORD")
-
-    msg = MIMEMultipart()
-    msg["From"] = sender_email
-    msg["To"] = ",".join(to_emails)
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
+if os.getenv("RFQ_EMBEDDED_WORKER") == "1":
+    get_embedded_worker()
 
-    try:
-        server = smtplib.SMTP("smtp.gmail.com", 587)  # Outlook için: smtp.office365.com
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, to_emails, msg.as_string())
-        server.quit()
-        return True
-    except Exception as e:
-        return str(e)
+# Teklif tablosu her sayfada çizilir; sayfa gezinmelerinde join + puanlama tekrar çalışmasın.
+# Teklifler değişince (kabul, inbox, kampanya bitişi) kullanıcının kaydı temizlenir.
+@st.cache_data(ttl=300, show_spinner=False)
+def load_ranked_offers(username):
+    return rank_user_offers(router, username)
 
 def fetch_recent_emails(limit=5):
     user = os.getenv("SENDER_EMAIL")
     password = os.getenv("SENDER_PASSWORD")
 
     try:
-        # Gmail için
-        mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
+        # Varsayılan Gmail; yük testinde IMAP_HOST/IMAP_PORT/IMAP_SSL ile yerel sahte sunucuya yönlenir
+        imap_cls = imaplib.IMAP4_SSL if os.getenv("IMAP_SSL", "1") == "1" else imaplib.IMAP4
+        mail = imap_cls(os.getenv("IMAP_HOST", "imap.gmail.com"), int(os.getenv("IMAP_PORT", "993")))
         mail.login(user, password)
         mail.select("inbox")
 
@@ -282,77 +143,6 @@ def fetch_recent_emails(limit=5):
     except Exception as e:
         return [{"error": str(e)}]
 
-def analyze_tender_about(text):
-    """
-    Kullanıcı tarafından girilen ürün/hizmet bilgisini özetleyip
-    e-mail konusu için kısa bir ifade üretir.
-    """
-    prompt = f"""
-    You are preparing text for an email about a tender.
-    Rules:
-    - Translate to English if needed (e.g., if Turkish).
-    - Give a short phrase (max 10 words).
-    - Include quantity if mentioned (e.g., "100 units of Parol medicine").
-    - Do NOT explain, only return the phrase to be used directly in the email.
-    
-    Tender about: "{text}"
-    """
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception:
-        return text
-
-
-def market_research(product_info, quantity=None):
-    """
-    AI destekli piyasa araştırması yapar.
-    - product_info: ürün açıklaması
-    - quantity: adet bilgisi (opsiyonel)
-    Çıktı: fiyat aralığı metin olarak
-    """
-    prompt = f"""
-    You are a market research assistant.
-    Estimate the typical wholesale price range in USD for the following product.
-    Consider international suppliers and bulk purchase scenarios.
-    If quantity is provided, scale the estimation accordingly.
-    Provide result as: "Estimated price range: X - Y USD per unit"
-    Product: {product_info}
-    Quantity: {quantity if quantity else "N/A"}
-    """
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Market research failed: {e}"
-
-
-    df = run_query(True, True, True, True)
-    if not df.empty:
-        return df
-    st.info("No exact match. Relaxing keyword filter...")
-    df = run_query(False, True, True, True)
-    if not df.empty:
-        return df
-    st.info("Still no match. Ignoring max price...")
-    df = run_query(False, False, True, True)
-    if not df.empty:
-        return df
-    st.info("Still no match. Allowing foreign suppliers...")
-    df = run_query(False, False, False, True)
-    if not df.empty:
-        return df
-    st.info("Still no match. Removing year restriction...")
-    return run_query(False, False, False, False)
-
 # ---------------- AUTH ----------------
 def load_users():
     with engine.connect() as conn:
@@ -376,24 +166,6 @@ def create_user(username, password, role="user"):
             {"u": username, "p": hashed, "r": role}
         )
         conn.commit()
-def save_offer(username, name, email, status="Bekleniyor", price=None, delivery=None, terms=None):
-    with engine.connect() as conn:
-        conn.execute(
-            text("""
-                INSERT INTO offers (username, supplier_name, supplier_email, status, price, delivery, terms)
-                VALUES (:u, :n, :e, :s, :p, :d, :t)
-            """),
-            {"u": username, "n": name, "e": email, "s": status, "p": price, "d": delivery, "t": terms}
-        )
-        conn.commit()
-
-def load_offers(username):
-    with engine.connect() as conn:
-        return pd.read_sql(
-            text("SELECT * FROM offers WHERE username = :u ORDER BY created_at DESC"),
-            conn,
-            params={"u": username}
-        )
 
 # ---------------- LOGIN & REGISTER ----------------
 if "username" not in st.session_state:
@@ -455,7 +227,7 @@ if page == "📋 Bidder List":
     offset = (page_no - 1) * limit
 
     def load_bidders(limit, offset):
-        with engine.connect() as conn:
+        with router.reader().connect() as conn:
             return pd.read_sql(
                 text(f"SELECT bidder_name FROM {BIDDER_TABLE} ORDER BY bidder_name LIMIT :limit OFFSET :offset"),
                 conn,
@@ -463,7 +235,7 @@ if page == "📋 Bidder List":
             )
 
     def load_tender_details(bidder):
-        with engine.connect() as conn:
+        with router.reader().connect() as conn:
             cols = pd.read_sql(
                 text("""
                     SELECT column_name FROM information_schema.columns
@@ -519,56 +291,63 @@ elif page == "📊 Analytics":
 
     selected_country = None
     if analysis_type == "Bidder Prices By Country":
-        with engine.connect() as conn:
+        with router.reader().connect() as conn:
             country_list = pd.read_sql(
                 text(f"SELECT DISTINCT bidder_country FROM {TENDER_TABLE} WHERE bidder_country IS NOT NULL ORDER BY bidder_country"),
                 conn
             )["bidder_country"].tolist()
         selected_country = st.sidebar.selectbox("Select Country", country_list)
 
-    if st.sidebar.button("Run Analysis"):
-        if analysis_type == "Country Comparison (Buyer Country)":
-            sql = f"""
-                SELECT tender_year, buyer_country, {metric_sql}
-                FROM {TENDER_TABLE}
-                WHERE buyer_country IS NOT NULL
-                GROUP BY tender_year, buyer_country
-                ORDER BY tender_year;
-            """
-        elif analysis_type == "Top Spending Bidders":
-            sql = f"""
-                SELECT tender_year, bidder_name, {metric_sql}
+    top_n = st.sidebar.slider("Series To Show", min_value=3, max_value=30, value=charts.TOP_N)
+
+    # analiz türü -> (filtre, seri kolonu, drill-down detay kolonu)
+    analyses = {
+        "Country Comparison (Buyer Country)": ("buyer_country IS NOT NULL", "buyer_country", "bidder_name"),
+        "Top Spending Bidders": ("bidder_name IS NOT NULL", "bidder_name", "buyer_country"),
+        "Bidder Prices By Country": ("bidder_country = :selected_country", "bidder_name", "buyer_country"),
+    }
+    where_sql, color_col, detail_col = analyses[analysis_type]
+    params = {"selected_country": selected_country} if selected_country else {}
+
+    @st.cache_data(ttl=600, show_spinner=False)
+    def run_analytics_query(sql, params):
+        with router.reader().connect() as conn:
+            return pd.read_sql(text(sql), conn, params=params)
+
+    def series_sql(where, series_col):
+        # İlk N seri + "Other": binlerce seri veritabanından hiç çıkmaz
+        return charts.top_n_sql(
+            f"""
+                SELECT tender_year, {series_col}, {metric_sql}
                 FROM {TENDER_TABLE}
-                WHERE bidder_name IS NOT NULL
-                GROUP BY tender_year, bidder_name
-                ORDER BY tender_year;
-            """
-        elif analysis_type == "Bidder Prices By Country":
-            sql = f"""
-                SELECT tender_year, bidder_country, bidder_name, {metric_sql}
-                FROM {TENDER_TABLE}
-                WHERE bidder_country = :selected_country
-                GROUP BY tender_year, bidder_country, bidder_name
-                ORDER BY tender_year;
-            """
-
-        with engine.connect() as conn:
-            if selected_country:
-                df = pd.read_sql(text(sql), conn, params={"selected_country": selected_country})
-            else:
-                df = pd.read_sql(text(sql), conn)
-
-        if analysis_type == "Country Comparison (Buyer Country)":
-            fig = px.line(df, x="tender_year", y=metric_col, color="buyer_country", markers=True)
-        elif analysis_type == "Top Spending Bidders":
-            top10 = df.groupby("bidder_name")[metric_col].sum().nlargest(10).index
-            df_top = df[df["bidder_name"].isin(top10)]
-            fig = px.line(df_top, x="tender_year", y=metric_col, color="bidder_name", markers=True)
-        elif analysis_type == "Bidder Prices By Country":
-            fig = px.line(df, x="tender_year", y=metric_col, color="bidder_name", markers=True)
-
-        fig.update_layout(template="plotly_white", font=dict(size=14), margin=dict(l=20, r=20, t=40, b=20))
+                WHERE {where}
+                GROUP BY tender_year, {series_col}
+            """,
+            "tender_year", series_col, metric_col
+        )
+
+    # Sonuç, ayarlar değişene kadar rerun'larda (ör. drill-down seçimi) ekranda kalır
+    if st.sidebar.button("Run Analysis"):
+        st.session_state["analysis"] = (analysis_type, metric, selected_country, top_n)
+
+    if st.session_state.get("analysis") == (analysis_type, metric, selected_country, top_n):
+        df = run_analytics_query(series_sql(where_sql, color_col), {**params, "top_n": top_n})
+        fig = charts.line_chart(df, "tender_year", metric_col, color_col)
         st.plotly_chart(fig, use_container_width=True)
+
+        # ---------- Drill-down: detay sadece seçilince çekilir ----------
+        series = sorted(str(v) for v in df[color_col].unique() if v != charts.OTHER_LABEL)
+        drill = st.selectbox(f"Drill Down Into {color_col}", ["—"] + series)
+        if drill != "—":
+            detail_df = run_analytics_query(
+                series_sql(f"{where_sql} AND {color_col} = :drill AND {detail_col} IS NOT NULL", detail_col),
+                {**params, "drill": drill, "top_n": top_n}
+            )
+            st.subheader(f"{drill} By {detail_col}")
+            if detail_df.empty:
+                st.warning("No detail records found.")
+            else:
+                st.plotly_chart(charts.line_chart(detail_df, "tender_year", metric_col, detail_col), use_container_width=True)
     else:
         st.info("Please select the analysis type and metric, then click 'Run Analysis'.")
 
@@ -594,13 +373,6 @@ elif page == "🤖 AI Supplier Finder":
         body_enc = body.replace("\n", "%0D%0A").replace(" ", "%20")
         return f"mailto:{to_email}?subject={subject_enc}&body={body_enc}"
 
-    # 🔹 Market research parse fonksiyonu
-    def parse_price_band(summary_text):
-        match = re.search(r"(\d+\.?\d*)\s*-\s*(\d+\.?\d*)", summary_text)
-        if match:
-            return float(match.group(1)), float(match.group(2))
-        return None, None
-
     # 🔹 Gelen e-postaları analiz et
     def analyze_offer_email(email_text, product_info):
         prompt = f"""
@@ -625,102 +397,83 @@ elif page == "🤖 AI Supplier Finder":
             return json.loads(resp.choices[0].message.content.strip())
         except Exception as e:
             return {"error": str(e)}
-    def lookup_company_email(company_name, website=None):
-        """
-        Şirket adı veya web sitesiyle internetten resmi iletişim e-postasını bulur.
-        Öncelik: sales@, info@, contact@ gibi adresler.
-        """
-        query = f"{company_name} contact email"
-        if website:
-            query += f" site:{website}"
-
-        try:
-            resp = requests.get(f"https://www.google.com/search?q={query}", headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-            soup = BeautifulSoup(resp.text, "html.parser")
-            text = soup.get_text()
-
-            emails = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
-            if emails:
-                for pref in ["sales@", "info@", "contact@", "office@", "support@"]:
-                    for e in emails:
-                        if pref in e.lower():
-                            return e
-                return emails[0]
-            else:
-                return None
-        except Exception:
-            return None
     # ---------- RFQ Gönder ----------
+    # Kampanya arka plandaki worker'a (python jobs.py worker) iş olarak verilir;
+    # sayfa sadece ilerlemeyi ve ara sonuçları okur.
     if st.button("🔎 Find Suppliers and Send RFQ"):
         if not user_query.strip() or not product_info.strip():
             st.warning("Please enter a query and product info.")
         else:
-            with st.spinner("Finding suppliers and sending RFQs..."):
-                market_summary = market_research(product_info)
-                st.subheader("📊 AI Market Research")
-                st.info(market_summary)
-                min_price, max_price = parse_price_band(market_summary)
-
-                filters = ai_extract_filters(user_query)
-                if filters:
-                    results_df = find_suppliers(filters)
-                    if results_df is not None and not results_df.empty:
-                        st.success(f"✅ Found {len(results_df)} suppliers.")
-
-                        tender_summary = analyze_tender_about(product_info)
-                        supplier_emails = [row["bidder_email"] for _, row in results_df.iterrows() if row["bidder_email"]]
-
-                        if supplier_emails:
-                            subject = f"Request for Quotation - {tender_summary}"
-                            body = (
-                                f"Dear Supplier,\n\n"
-                                f"We are currently evaluating suppliers for {tender_summary}.\n"
-                                f"Could you please provide us with your best offer including:\n"
-                                f"- Price per unit\n"
-                                f"- Delivery time\n"
-                                f"- Payment terms\n\n"
-                                f"Best regards,\n{contact_identity}"
-                            )
-
-                            result = send_email_smtp(supplier_emails, subject, body)
-                            if result is True:
-                                st.success("📨 RFQ emails sent successfully to all suppliers.")
-                            else:
-                                st.error(f"Failed to send emails: {result}")
-# RFQ gönderilen şirketleri veritabanına kaydet
-                        for _, row in results_df.iterrows():
-                            found_email = lookup_company_email(row["bidder_name"], row["bidder_url"])
-                            email_to_use = found_email or row["bidder_email"]
-
-                            save_offer(
-                                username=st.session_state["username"],
-                                name=row["bidder_name"],
-                                email=email_to_use,
-                                status="Bekleniyor"
-                            )
-
-
-                        
-
-                        # Bilgi amaçlı liste
-                        for i, row in results_df.iterrows():
-                            with st.expander(f"🏢 {row['bidder_name']}"):
-                                st.write(f"📍 Country: **{row['bidder_country']}**")
-                                st.write(f"📧 {row['bidder_email'] or 'N/A'}")
-                                st.write(f"🌐 {row['bidder_url'] or 'N/A'}")
-                                st.write(f"🏭 Industry: {summarize_industry(row['bidder_name'], row['bidder_url'])}")
-
-                        fig = px.bar(results_df, x="bidder_name", y="tender_count", color="bidder_country")
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.warning("No suppliers matched your criteria.")
-                else:
-                    st.error("❌ Failed to parse filters from your query.")
+            st.session_state["rfq_job_id"] = jobs.submit_job(engine, st.session_state["username"], {
+                "user_query": user_query,
+                "product_info": product_info,
+                "contact_identity": contact_identity,
+            })
+
+    # Sayfadan ayrılıp geri dönünce kullanıcının son kampanyası gösterilir
+    job_id = st.session_state.get("rfq_job_id") or jobs.latest_job_id(engine, st.session_state["username"])
+
+    def render_job(job_id):
+        job = jobs.load_job(engine, job_id)
+        if not job:
+            return
+        results = job["results"]
+        active = job["status"] in ("queued", "running")
+
+        st.subheader(f"📡 Campaign #{job_id} ({job['status']})")
+        with st.expander("Progress", expanded=active):
+            for event in jobs.load_events(engine, job_id):
+                st.write(f"`{event['stage']}` {event['message']}")
+        if job["status"] == "failed":
+            st.error(f"❌ {job['error']}")
+
+        if "market_research" in results:
+            st.subheader("📊 AI Market Research")
+            st.info(results["market_research"]["summary"])
+
+        suppliers = results.get("suppliers")
+        if suppliers is not None and not suppliers:
+            st.warning("No suppliers matched your criteria.")
+        elif suppliers:
+            st.success(f"✅ Found {len(suppliers)} suppliers.")
+            send = results.get("send_rfq")
+            if send and send["sent"]:
+                st.success("📨 RFQ emails sent successfully to all suppliers.")
+            elif send:
+                st.error(f"Failed to send emails: {send['error']}")
+
+            # Bilgi amaçlı liste; sektör bilgisi geldikçe dolar
+            enriched = results.get("enrich") or results.get("enrich_partial", {})
+            for row in suppliers:
+                with st.expander(f"🏢 {row['bidder_name']}"):
+                    st.write(f"📍 Country: **{row['bidder_country']}**")
+                    st.write(f"📧 {row['bidder_email'] or 'N/A'}")
+                    st.write(f"🌐 {row['bidder_url'] or 'N/A'}")
+                    info = enriched.get(row["bidder_name"])
+                    st.write(f"🏭 Industry: {info['industry'] if info else '⏳ Looking up...'}")
+
+            fig = px.bar(pd.DataFrame(suppliers), x="bidder_name", y="tender_count", color="bidder_country")
+            st.plotly_chart(fig, use_container_width=True)
+
+        if not active and st.session_state.get("rfq_job_done") != job_id:
+            # Polling'i durdurmak ve teklif tablosunu yenilemek için tüm sayfayı bir kez yeniden çalıştır
+            st.session_state["rfq_job_done"] = job_id
+            load_ranked_offers.clear(st.session_state["username"])
+            st.rerun()
+
+    if job_id:
+        polling = st.session_state.get("rfq_job_done") != job_id
+        st.fragment(run_every=2 if polling else None)(render_job)(job_id)
 
     # ---------- Inbox Analizi ----------
     if st.button("📥 Check Inbox for Offers"):
         st.subheader("📥 Supplier Email Analysis")
 
+        # Piyasa bandı son kampanyanın araştırmasından gelir
+        job = jobs.load_job(engine, job_id) if job_id else None
+        band = job["results"].get("market_research", {}) if job else {}
+        min_price, max_price = band.get("min_price"), band.get("max_price")
+
         # TODO: Gmail/Outlook API entegrasyonu
         emails = fetch_recent_emails()
         for mail in emails:
@@ -767,22 +520,33 @@ elif page == "🤖 AI Supplier Finder":
                     st.warning(f"⚠️ Offer {price} USD is above market.")
                 else:
                     st.success(f"✅ Offer {price} USD is acceptable (within/below market).")
+        load_ranked_offers.clear(st.session_state["username"])
           # ---------- Teklif Tablosu ----------
 
-# Teklifleri veritabanından çek ve göster
-offers_df = load_offers(st.session_state["username"])
+# Teklifleri veritabanından çek, puanlayıp kampanya bazında sıralı göster
+offers_df = load_ranked_offers(st.session_state["username"])
 if not offers_df.empty:
     st.subheader("📑 Supplier Offers")
-    st.dataframe(offers_df, use_container_width=True)
-
-    for i, row in offers_df.iterrows():
-        if row["status"] == "Teklif Geldi":
-            if st.button(f"✅ Accept {row['supplier_name']}", key=f"accept_{i}"):
-                with engine.connect() as conn:
-                    conn.execute(
-                        text("UPDATE offers SET status = 'Kabul Edildi ✅' WHERE id = :id"),
-                        {"id": row["id"]}
-                    )
-                    conn.commit()
-                st.success(f"Offer from {row['supplier_name']} accepted.")
-                st.rerun()
+    st.caption("Ranked per campaign by price against the market band, delivery time, payment terms and tender history.")
+    st.dataframe(offers_df, use_container_width=True, hide_index=True)
+
+    # Satır başına buton yerine tek seçim kutusu: teklif sayısı arttıkça widget sayısı artmaz
+    arrived = offers_df[offers_df["status"] == "Teklif Geldi"]
+    if not arrived.empty:
+        labels = dict(zip(
+            arrived["id"],
+            arrived["rank"].map(lambda r: f"#{r:.0f}" if r == r else "#-")
+            + " " + arrived["supplier_name"].fillna("")
+            + " (" + arrived["price"].map(lambda p: f"{p} USD") + ")"
+        ))
+        offer_id = st.selectbox("Offer to accept", list(labels), format_func=labels.get)
+        if st.button("✅ Accept Offer"):
+            with engine.connect() as conn:
+                conn.execute(
+                    text("UPDATE offers SET status = 'Kabul Edildi ✅' WHERE id = :id"),
+                    {"id": int(offer_id)}
+                )
+                conn.commit()
+            load_ranked_offers.clear(st.session_state["username"])
+            st.success(f"Offer {labels[offer_id]} accepted.")
+            st.rerun()
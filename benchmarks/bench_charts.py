@@ -0,0 +1,124 @@
+"""
+Analitik grafik benchmark'ı.
+
+Varsayılan mod uygulamanın gerçek yolunu ölçer: seed'lenmiş bir veritabanında
+(python migrations.py seed) "baseline" eski davranıştır (tüm (yıl, seri)
+satırları çekilir, marker'lı SVG px.line), "charts" app.py'deki yoldur
+(charts.top_n_sql ile ilk N + Other, ardından charts.line_chart). Sorgu
+süresi ve dönen satır sayısı da raporlanır.
+
+--synthetic veritabanı gerektirmez ve sadece charts.line_chart'ı (seyreltme +
+WebGL) az sayıda çok uzun seri üzerinde ölçer; ilk N katmanını kapsamaz.
+Tarayıcıdaki çizim süresi için trace ve nokta sayısı vekil ölçü olarak raporlanır.
+
+    python -m benchmarks.bench_charts
+    python -m benchmarks.bench_charts --synthetic
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from sqlalchemy import text
+import charts
+
+X = "tender_year"
+METRICS = {
+    "tender_count": "COUNT(*) AS tender_count",
+    "total_price": 'SUM("tender_finalpriceUsd") AS total_price',
+}
+# app.py'deki analiz türleri: (filtre, seri kolonu)
+ANALYSES = {
+    "country comparison": ("buyer_country IS NOT NULL", "buyer_country"),
+    "top bidders": ("bidder_name IS NOT NULL", "bidder_name"),
+}
+
+
+def base_sql(where, color, metric):
+    from db import TENDER_TABLE
+
+    return f"""
+        SELECT {X}, {color}, {METRICS[metric]}
+        FROM {TENDER_TABLE}
+        WHERE {where}
+        GROUP BY {X}, {color}
+    """
+
+
+def baseline_chart(df, y, color):
+    return px.line(df, x=X, y=y, color=color, markers=True)
+
+
+def measure_figure(fig):
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return {
+        "traces": len(fig.data),
+        "points": sum(len(trace.x) for trace in fig.data),
+        "trace_type": fig.data[0].type if fig.data else "-",
+        "json_ms": (time.perf_counter() - start) * 1000,
+        "payload_kb": len(payload.encode("utf-8")) / 1024,
+    }
+
+
+def run_db(top_n=charts.TOP_N):
+    from db import create_router
+
+    router = create_router("bench")
+    engine = router.reader()
+    print(f"{'case':<30} {'layer':<9} {'rows':>7} {'query ms':>9} {'traces':>6} {'points':>7} "
+          f"{'type':>9} {'build ms':>9} {'json ms':>8} {'payload KB':>11}")
+    try:
+        for name, (where, color) in ANALYSES.items():
+            for metric in METRICS:
+                sql = base_sql(where, color, metric)
+                layers = (
+                    ("baseline", sql + f" ORDER BY {X}", {}, baseline_chart),
+                    ("charts", charts.top_n_sql(sql, X, color, metric), {"top_n": top_n},
+                     lambda df, y, c: charts.line_chart(df, X, y, c)),
+                )
+                for label, query, params, build in layers:
+                    start = time.perf_counter()
+                    with engine.connect() as conn:
+                        df = pd.read_sql(text(query), conn, params=params)
+                    fetched = time.perf_counter()
+                    fig = build(df, metric, color)
+                    built = time.perf_counter()
+                    r = measure_figure(fig)
+                    print(f"{name + ' / ' + metric:<30} {label:<9} {len(df):>7} {(fetched - start) * 1000:>9.0f} "
+                          f"{r['traces']:>6} {r['points']:>7} {r['trace_type']:>9} {(built - fetched) * 1000:>9.0f} "
+                          f"{r['json_ms']:>8.0f} {r['payload_kb']:>11.0f}")
+    finally:
+        router.dispose()
+
+
+def dense_series(groups, years, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        X: np.tile(np.arange(2000, 2000 + years), groups),
+        "buyer_country": np.repeat([f"C{i:04d}" for i in range(groups)], years),
+        "tender_count": rng.integers(0, 1000, groups * years),
+    })
+
+
+def run_synthetic():
+    df = dense_series(8, 20000)
+    print(f"{'case (line_chart only)':<24} {'layer':<9} {'traces':>6} {'points':>7} {'type':>9} "
+          f"{'build ms':>9} {'json ms':>8} {'payload KB':>11}")
+    for label, build in (
+        ("baseline", lambda: baseline_chart(df, "tender_count", "buyer_country")),
+        ("charts", lambda: charts.line_chart(df, X, "tender_count", "buyer_country")),
+    ):
+        start = time.perf_counter()
+        fig = build()
+        built = time.perf_counter()
+        r = measure_figure(fig)
+        print(f"{'8 series x 20000 points':<24} {label:<9} {r['traces']:>6} {r['points']:>7} {r['trace_type']:>9} "
+              f"{(built - start) * 1000:>9.0f} {r['json_ms']:>8.0f} {r['payload_kb']:>11.0f}")
+
+
+if __name__ == "__main__":
+    if "--synthetic" in sys.argv[1:]:
+        run_synthetic()
+    else:
+        run_db()
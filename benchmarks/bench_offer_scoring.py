@@ -0,0 +1,61 @@
+"""
+Teklif puanlama benchmark'ı. Veritabanı gerekmez, sentetik teklif üretir.
+
+    python -m benchmarks.bench_offer_scoring [offers] [campaigns]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from offer_scoring import score_offers, ranked_view
+
+DELIVERIES = ["2 weeks", "10-15 days", "in stock", "1 month", "3 business days", "45 days",
+              "6-8 weeks", "immediate", "teslim 20 days", None]
+TERMS = ["Net 30", "net 60", "100% advance", "L/C at sight", "payment on delivery",
+         "30 days after invoice", "cash against documents", "50/50", None]
+
+
+def make_offers(n, campaigns, seed=0):
+    rng = np.random.default_rng(seed)
+    job_id = rng.integers(1, campaigns + 1, n)
+    band_min = rng.uniform(5, 50, campaigns + 1)
+    price = rng.uniform(2, 120, n)
+    price[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "job_id": job_id,
+        "supplier_name": "Bidder " + pd.Series(rng.integers(1, n // 3 + 2, n)).astype(str),
+        "supplier_email": "sales@example.com",
+        "status": "Teklif Geldi",
+        "price": price,
+        "delivery": rng.choice(np.array(DELIVERIES, dtype=object), n),
+        "terms": rng.choice(np.array(TERMS, dtype=object), n),
+        "band_min": band_min[job_id],
+        "band_max": band_min[job_id] * 2,
+    })
+
+
+def make_track_record(offers, seed=0):
+    rng = np.random.default_rng(seed)
+    names = offers["supplier_name"].drop_duplicates()
+    return pd.DataFrame({"bidder_name": names, "tender_count": rng.integers(0, 500, len(names))})
+
+
+def bench(n, campaigns, repeat=7):
+    offers = make_offers(n, campaigns)
+    track = make_track_record(offers)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ranked_view(score_offers(offers, track))
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), float(np.median(timings))
+
+
+if __name__ == "__main__":
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [1_000, 10_000, 50_000, 200_000]
+    campaigns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{'offers':>8} {'campaigns':>9} {'best ms':>9} {'median ms':>10}")
+    for n in sizes:
+        best, median = bench(n, campaigns)
+        print(f"{n:>8} {campaigns:>9} {best:>9.1f} {median:>10.1f}")
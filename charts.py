@@ -0,0 +1,111 @@
+"""
+Analitik grafikleri için veri katmanı.
+
+Tarayıcıya giden Plotly JSON'unu küçük tutmak için:
+    - seriler SQL tarafında ilk N ile sınırlanır, kalanı "Other" serisinde toplanır
+    - yoğun seriler sunucuda min/max kovalarıyla seyreltilir
+    - toplam nokta sayısı eşiği aşarsa WebGL trace'leri kullanılır
+"""
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+OTHER_LABEL = "Other"
+# Seri kolonu boş olan satırlar bu etiketle tek seri olarak çizilir
+NULL_LABEL = "(none)"
+TOP_N = int(os.getenv("CHART_TOP_N", "10"))
+MAX_POINTS_PER_SERIES = int(os.getenv("CHART_MAX_POINTS_PER_SERIES", "400"))
+WEBGL_THRESHOLD = int(os.getenv("CHART_WEBGL_THRESHOLD", "1000"))
+# Bu sayının üstünde marker çizilmez, sadece çizgi
+MARKER_THRESHOLD = 200
+
+
+def top_n_sql(base_sql, x, color, value):
+    """
+    (x, color, value) döndüren bir GROUP BY sorgusunu sarar: toplamda en büyük
+    :top_n seri olduğu gibi kalır, diğerleri x bazında tek "Other" serisinde toplanır.
+    Böylece binlerce seri veritabanından hiç çıkmaz.
+    """
+    return f"""
+        WITH base AS ({base_sql}),
+        top AS (
+            SELECT {color} FROM base
+            GROUP BY {color}
+            ORDER BY SUM({value}) DESC NULLS LAST
+            LIMIT :top_n
+        )
+        SELECT base.{x},
+               CASE WHEN top.{color} IS NULL THEN '{OTHER_LABEL}' ELSE CAST(base.{color} AS text) END AS {color},
+               SUM(base.{value}) AS {value}
+        FROM base
+        LEFT JOIN top ON top.{color} = base.{color}
+        GROUP BY 1, 2
+        ORDER BY 1
+    """
+
+
+def _bucket_extreme(rows, keys, values, reduce):
+    """
+    keys sıralı olduğundan her kova ardışık bir dilimdir; reduce (np.fmin/np.fmax)
+    dilim bazında uygulanır ve her kovada bu değere ulaşan ilk satır döner.
+    Tamamı NaN olan kovadan satır dönmez.
+    """
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    segment = np.cumsum(np.r_[True, keys[1:] != keys[:-1]]) - 1
+    extremes = reduce.reduceat(values, starts)
+    hits = np.flatnonzero(values == extremes[segment])
+    _, first = np.unique(segment[hits], return_index=True)
+    return rows[hits[first]]
+
+
+def downsample(df, x, color, value, max_points=MAX_POINTS_PER_SERIES):
+    """
+    max_points'ten uzun serileri eşit kovalara böler ve her kovadan en küçük ile
+    en büyük değeri tutar; tepe ve dipler kaybolmaz, seri başına en fazla max_points nokta kalır.
+    Seri içi x sırası korunur; Plotly çizgiyi satır sırasıyla çizer.
+    """
+    codes = pd.factorize(df[color], use_na_sentinel=False)[0]
+    order = np.lexsort((df[x].to_numpy(), codes))
+    df = df.iloc[order].reset_index(drop=True)
+    codes = codes[order]
+    counts = np.bincount(codes) if len(codes) else np.zeros(0, dtype=int)
+    if counts.size == 0 or counts.max() <= max_points:
+        return df
+
+    sizes = counts[codes]
+    position = np.arange(len(df)) - (np.cumsum(counts) - counts)[codes]
+    # Kova başına en fazla 2 nokta + ilk/son nokta: seri başına <= max_points
+    buckets = max((max_points - 2) // 2, 1)
+    keys = codes.astype(np.int64) * buckets + position * buckets // sizes
+
+    dense = np.flatnonzero(sizes > max_points)
+    values = df[value].to_numpy(dtype=float)[dense]
+    keep = sizes <= max_points
+    keep[_bucket_extreme(dense, keys[dense], values, np.fmin)] = True
+    keep[_bucket_extreme(dense, keys[dense], values, np.fmax)] = True
+    # Serinin ilk ve son noktası her zaman kalır
+    keep[(position == 0) | (position == sizes - 1)] = True
+    return df[keep].reset_index(drop=True)
+
+
+def compact(df, x, color, value):
+    """Sadece grafikte kullanılan kolonları, JSON'da kısa yazılacak tiplerle bırakır."""
+    out = df[[x, color, value]].copy()
+    out[color] = out[color].astype(object).where(out[color].notna(), NULL_LABEL)
+    out[value] = pd.to_numeric(out[value], errors="coerce").astype("float64").round(2)
+    return out.dropna(subset=[x])
+
+
+def line_chart(df, x, y, color, max_points=MAX_POINTS_PER_SERIES, webgl_threshold=WEBGL_THRESHOLD):
+    """Seyreltilmiş, gerekirse WebGL ile çizilen çizgi grafik döner."""
+    data = downsample(compact(df, x, color, y), x, color, y, max_points)
+    points = len(data)
+    fig = px.line(
+        data, x=x, y=y, color=color,
+        markers=points <= MARKER_THRESHOLD,
+        render_mode="webgl" if points > webgl_threshold else "svg",
+    )
+    fig.update_layout(template="plotly_white", font=dict(size=14), margin=dict(l=20, r=20, t=40, b=20))
+    return fig
+
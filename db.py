@@ -0,0 +1,168 @@
+"""
+Veritabanı bağlantıları: yazmalar için primary, okuma ağırlıklı sorgular
+(Bidder List, analitik, tedarikçi arama) için read-replica engine'leri.
+
+Replica tanımlı değilse okumalar primary'de ayrı bir salt-okunur engine'e
+(primary-read) gider; analitik sorguları yazma havuzunu ve 5 sn'lik yazma
+timeout'unu paylaşmaz.
+Bağlantıları kontrol etmek için:
+    python db.py
+"""
+import os
+import itertools
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------- DB SETTINGS ----------------
+DB_USER = os.getenv("DB_USER", "postgres").strip()
+DB_PASS = os.getenv("DB_PASS", "").strip()
+DB_HOST = os.getenv("DB_HOST", "127.0.0.1").strip()
+DB_PORT = os.getenv("DB_PORT", "5432").strip()
+DB_NAME = os.getenv("DB_NAME", "postgres").strip()
+BIDDER_TABLE = os.getenv("TABLE_NAME_BIDDER", "bidder_list").strip()
+TENDER_TABLE = os.getenv("TABLE_NAME_TENDER", "tender_data").strip()
+
+# "host:port,host:port" — boşsa replica yok
+DB_REPLICA_HOSTS = os.getenv("DB_REPLICA_HOSTS", "").strip()
+
+DB_APP_NAME = os.getenv("DB_APP_NAME", "tender-dashboard").strip()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+# milisaniye, 0 = limitsiz
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+DB_READ_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_READ_STATEMENT_TIMEOUT_MS", "30000"))
+
+
+def parse_hosts(value):
+    hosts = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(":")
+        hosts.append((host, int(port or DB_PORT)))
+    return hosts
+
+
+def make_url(host=DB_HOST, port=DB_PORT):
+    return URL.create(
+        drivername="postgresql+psycopg2",
+        username=DB_USER,
+        password=DB_PASS,
+        host=host,
+        port=int(port),
+        database=DB_NAME
+    )
+
+
+def make_engine(host=DB_HOST, port=DB_PORT, role="primary", pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW, statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+                read_only=False):
+    """
+    Rol etiketli engine oluşturur. application_name pg_stat_activity'de
+    hangi havuzun hangi sorguyu çalıştırdığını gösterir.
+    """
+    options = f"-c statement_timeout={statement_timeout_ms}"
+    if read_only:
+        options += " -c default_transaction_read_only=on"
+    return create_engine(
+        make_url(host, port),
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args={
+            "application_name": f"{DB_APP_NAME}:{role}",
+            "options": options,
+        }
+    )
+
+
+class EngineRouter:
+    """Yazmaları primary'ye sabitler, okumaları okuma engine'leri arasında sırayla dağıtır."""
+
+    def __init__(self, primary, replicas=None):
+        self.primary = primary
+        self.replicas = replicas or []
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+
+    def writer(self):
+        return self.primary
+
+    def reader(self):
+        if not self._cycle:
+            return self.primary
+        with self._lock:
+            return next(self._cycle)
+
+    def all_engines(self):
+        return [("primary", self.primary)] + [(f"reader{i}", e) for i, e in enumerate(self.replicas, 1)]
+
+    def dispose(self):
+        for _, engine in self.all_engines():
+            engine.dispose()
+
+
+def create_router(component=None):
+    """
+    component verilirse application_name'e eklenir (ör. "worker" ->
+    tender-dashboard:worker-primary); aynı DB'yi paylaşan süreçler ayırt edilir.
+    """
+    prefix = f"{component}-" if component else ""
+    primary = make_engine(role=f"{prefix}primary")
+
+    def read_engine(host, port, role):
+        return make_engine(
+            host, port,
+            role=f"{prefix}{role}",
+            pool_size=DB_READ_POOL_SIZE,
+            max_overflow=DB_READ_MAX_OVERFLOW,
+            statement_timeout_ms=DB_READ_STATEMENT_TIMEOUT_MS,
+            read_only=True
+        )
+
+    hosts = parse_hosts(DB_REPLICA_HOSTS)
+    if hosts:
+        readers = [read_engine(host, port, f"replica{i}") for i, (host, port) in enumerate(hosts, 1)]
+    else:
+        # Replica yok: okumalar yine primary'ye ama ayrı havuz ve okuma timeout'uyla
+        readers = [read_engine(DB_HOST, DB_PORT, "primary-read")]
+    return EngineRouter(primary, readers)
+
+
+def describe(router):
+    """Her engine'in gerçekten hangi sunucuya bağlandığını döner."""
+    rows = []
+    for name, engine in router.all_engines():
+        with engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT inet_server_port(), pg_is_in_recovery(),
+                       current_setting('application_name'),
+                       current_setting('statement_timeout'),
+                       current_setting('default_transaction_read_only')
+            """)).one()
+        rows.append({
+            "engine": name,
+            "port": row[0],
+            "in_recovery": row[1],
+            "application_name": row[2],
+            "statement_timeout": row[3],
+            "read_only": row[4],
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    router = create_router()
+    for info in describe(router):
+        print(info)
+    print(f"writer -> {router.writer().url.port}, reader -> {router.reader().url.port}")
+    router.dispose()
@@ -0,0 +1,388 @@
+"""
+RFQ kampanyaları için kalıcı arka plan işleri.
+
+Sayfa bir işi rfq_jobs tablosuna yazar ve hemen döner; ayrı bir worker süreci
+işi alır, birbirine bağımlı olmayan adımları paralel çalıştırır ve her adımın
+sonucunu ile ilerleme mesajlarını veritabanına yazar. Worker yeniden başlarsa
+heartbeat'i eskimiş işler tekrar alınır ve tamamlanmış adımlar atlanır.
+
+Worker'ı başlatmak için:
+    python jobs.py worker
+"""
+import os
+import sys
+import json
+import uuid
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from sqlalchemy import text
+import rfq
+from db import create_router
+
+log = logging.getLogger("jobs")
+
+JOB_WORKERS = int(os.getenv("RFQ_JOB_WORKERS", "4"))
+STAGE_THREADS = int(os.getenv("RFQ_STAGE_THREADS", "4"))
+ENRICH_THREADS = int(os.getenv("RFQ_ENRICH_THREADS", "8"))
+POLL_INTERVAL = float(os.getenv("RFQ_POLL_INTERVAL", "1.0"))
+HEARTBEAT_INTERVAL = int(os.getenv("RFQ_HEARTBEAT_INTERVAL", "10"))
+STALE_AFTER = int(os.getenv("RFQ_STALE_AFTER", "60"))
+
+
+# ---------------- JOB STORE ----------------
+def submit_job(engine, username, params):
+    """Yeni bir RFQ kampanyası kuyruğa ekler ve job id döner."""
+    with engine.begin() as conn:
+        job_id = conn.execute(
+            text("""
+                INSERT INTO rfq_jobs (username, params)
+                VALUES (:u, CAST(:p AS jsonb))
+                RETURNING id
+            """),
+            {"u": username, "p": json.dumps(params)}
+        ).scalar()
+        _add_event(conn, job_id, "queued", "Campaign queued.")
+    return job_id
+
+
+def load_job(engine, job_id):
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("""
+                SELECT id, username, status, params, results, error, created_at, updated_at
+                FROM rfq_jobs WHERE id = :id
+            """),
+            {"id": job_id}
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+def latest_job_id(engine, username):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT id FROM rfq_jobs WHERE username = :u ORDER BY created_at DESC LIMIT 1"),
+            {"u": username}
+        ).scalar()
+
+
+def load_events(engine, job_id, after_id=0):
+    with engine.connect() as conn:
+        return [
+            dict(row) for row in conn.execute(
+                text("""
+                    SELECT id, stage, message, created_at FROM rfq_job_events
+                    WHERE job_id = :id AND id > :after
+                    ORDER BY id
+                """),
+                {"id": job_id, "after": after_id}
+            ).mappings()
+        ]
+
+
+def _add_event(conn, job_id, stage, message):
+    conn.execute(
+        text("INSERT INTO rfq_job_events (job_id, stage, message) VALUES (:j, :s, :m)"),
+        {"j": job_id, "s": stage, "m": message}
+    )
+
+
+def _save_result(conn, job_id, key, value):
+    conn.execute(
+        text("""
+            UPDATE rfq_jobs
+            SET results = results || jsonb_build_object(CAST(:k AS text), CAST(:v AS jsonb)), updated_at = now()
+            WHERE id = :id
+        """),
+        {"id": job_id, "k": key, "v": json.dumps(value, default=str)}
+    )
+
+
+def _save_partial(conn, job_id, key, item, value):
+    """results[key][item] = value; uzun adımların ara sonuçlarını saklar."""
+    conn.execute(
+        text("""
+            UPDATE rfq_jobs
+            SET results = jsonb_set(
+                    results, ARRAY[CAST(:k AS text)],
+                    COALESCE(results -> CAST(:k AS text), '{}'::jsonb)
+                        || jsonb_build_object(CAST(:i AS text), CAST(:v AS jsonb))),
+                updated_at = now()
+            WHERE id = :id
+        """),
+        {"id": job_id, "k": key, "i": item, "v": json.dumps(value, default=str)}
+    )
+
+
+class JobContext:
+    """Adım fonksiyonlarına verilen, ilerleme ve sonuç yazma yardımcıları."""
+
+    def __init__(self, router, job):
+        self.router = router
+        self.job_id = job["id"]
+        self.username = job["username"]
+        self.params = job["params"]
+        self.results = dict(job["results"] or {})
+        self._lock = threading.Lock()
+
+    def progress(self, stage, message):
+        with self.router.writer().begin() as conn:
+            _add_event(conn, self.job_id, stage, message)
+
+    def save(self, key, value, message=None):
+        with self.router.writer().begin() as conn:
+            _save_result(conn, self.job_id, key, value)
+            if message:
+                _add_event(conn, self.job_id, key, message)
+        with self._lock:
+            self.results[key] = value
+
+    def save_partial(self, key, item, value):
+        with self.router.writer().begin() as conn:
+            _save_partial(conn, self.job_id, key, item, value)
+        with self._lock:
+            self.results.setdefault(key, {})[item] = value
+
+
+# ---------------- STAGES ----------------
+def stage_market_research(ctx):
+    summary = rfq.market_research(ctx.params["product_info"])
+    min_price, max_price = rfq.parse_price_band(summary)
+    return {"summary": summary, "min_price": min_price, "max_price": max_price}
+
+
+def stage_filters(ctx):
+    return rfq.ai_extract_filters(ctx.params["user_query"])
+
+
+def stage_tender_summary(ctx):
+    return rfq.analyze_tender_about(ctx.params["product_info"])
+
+
+def stage_suppliers(ctx):
+    df = rfq.find_suppliers(
+        ctx.results["filters"],
+        ctx.router.reader(),
+        notify=lambda message: ctx.progress("suppliers", message)
+    )
+    return json.loads(df.to_json(orient="records"))
+
+
+def stage_send_rfq(ctx):
+    # SMTP gönderimi geri alınamaz: önceki deneme yarıda kaldıysa tekrar göndermeyiz.
+    if ctx.results.get("send_rfq_attempt"):
+        return {"sent": None, "error": "Previous send attempt was interrupted; not resent."}
+    emails = [row["bidder_email"] for row in ctx.results["suppliers"] if row.get("bidder_email")]
+    if not emails:
+        return {"sent": False, "error": "No supplier emails found."}
+    ctx.save("send_rfq_attempt", True)
+    subject, body = rfq.build_rfq_email(ctx.results["tender_summary"], ctx.params["contact_identity"])
+    result = rfq.send_email_smtp(emails, subject, body)
+    if result is True:
+        return {"sent": True, "recipients": emails}
+    return {"sent": False, "error": result}
+
+
+def stage_enrich(ctx):
+    """Her tedarikçi için e-posta ve sektör bilgisini paralel toplar; yarıda kalırsa kaldığı yerden devam eder."""
+    done = ctx.results.get("enrich_partial", {})
+    todo = [row for row in ctx.results["suppliers"] if row["bidder_name"] not in done]
+
+    def enrich(row):
+        found_email = rfq.lookup_company_email(row["bidder_name"], row.get("bidder_url"))
+        industry = rfq.summarize_industry(row["bidder_name"], row.get("bidder_url"))
+        ctx.save_partial("enrich_partial", row["bidder_name"], {
+            "email": found_email or row.get("bidder_email"),
+            "industry": industry,
+        })
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(ENRICH_THREADS, len(todo))) as pool:
+            list(pool.map(enrich, todo))
+    return ctx.results.get("enrich_partial", {})
+
+
+def stage_save_offers(ctx):
+    # Teklif satırları ve adım sonucu aynı transaction'da yazılır, resume'da çift kayıt olmaz.
+    enriched = ctx.results["enrich"]
+    with ctx.router.writer().begin() as conn:
+        for row in ctx.results["suppliers"]:
+            conn.execute(
+                text("""
+                    INSERT INTO offers (username, supplier_name, supplier_email, status, job_id)
+                    VALUES (:u, :n, :e, 'Bekleniyor', :j)
+                """),
+                {
+                    "u": ctx.username,
+                    "n": row["bidder_name"],
+                    "e": enriched.get(row["bidder_name"], {}).get("email") or row.get("bidder_email"),
+                    "j": ctx.job_id,
+                }
+            )
+        _save_result(conn, ctx.job_id, "save_offers", len(ctx.results["suppliers"]))
+        _add_event(conn, ctx.job_id, "save_offers", "Offers recorded.")
+    ctx.results["save_offers"] = len(ctx.results["suppliers"])
+    return None
+
+
+# (isim, bağımlılıklar, fonksiyon, bitiş mesajı)
+STAGES = [
+    ("market_research", [], stage_market_research, "Market research finished."),
+    ("filters", [], stage_filters, "Search filters extracted."),
+    ("tender_summary", [], stage_tender_summary, "Tender summary ready."),
+    ("suppliers", ["filters"], stage_suppliers, "Supplier search finished."),
+    ("send_rfq", ["suppliers", "tender_summary"], stage_send_rfq, "RFQ emails processed."),
+    ("enrich", ["suppliers"], stage_enrich, "Supplier details collected."),
+    ("save_offers", ["enrich"], stage_save_offers, None),
+]
+
+
+def run_job(router, job, stage_threads=STAGE_THREADS):
+    """Adımları bağımlılık sırasına göre çalıştırır; hazır olan adımlar paralel koşar."""
+    ctx = JobContext(router, job)
+    pending = {name: (deps, fn, message) for name, deps, fn, message in STAGES if name not in ctx.results}
+    if not pending:
+        return
+
+    with ThreadPoolExecutor(max_workers=stage_threads) as pool:
+        running = {}
+        while pending or running:
+            for name in list(pending):
+                deps, fn, message = pending[name]
+                if all(dep in ctx.results for dep in deps):
+                    del pending[name]
+                    running[pool.submit(fn, ctx)] = (name, message)
+
+            if not running:
+                raise RuntimeError(f"Unsatisfiable stages: {sorted(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, message = running.pop(future)
+                value = future.result()
+                if name == "suppliers" and not value:
+                    ctx.save(name, value, "No suppliers matched your criteria.")
+                    pending.clear()
+                elif name != "save_offers":
+                    ctx.save(name, value, message)
+
+
+# ---------------- WORKER ----------------
+class JobWorker:
+    """
+    Kuyruktan iş alan worker. Aynı anda en fazla max_jobs iş çalıştırır;
+    birden fazla worker süreci FOR UPDATE SKIP LOCKED sayesinde güvenle paralel çalışabilir.
+    """
+
+    def __init__(self, router, max_jobs=JOB_WORKERS):
+        self.router = router
+        self.max_jobs = max_jobs
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.active = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def claim(self):
+        with self.router.writer().begin() as conn:
+            row = conn.execute(
+                text("""
+                    UPDATE rfq_jobs
+                    SET status = 'running', worker_id = :w, heartbeat_at = now(), updated_at = now()
+                    WHERE id = (
+                        SELECT id FROM rfq_jobs
+                        WHERE status = 'queued'
+                           OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale))
+                        ORDER BY created_at
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING id, username, params, results
+                """),
+                {"w": self.worker_id, "stale": STALE_AFTER}
+            ).mappings().first()
+            if row and row["results"]:
+                _add_event(conn, row["id"], "worker", "Resumed after restart.")
+        return dict(row) if row else None
+
+    def heartbeat(self):
+        with self._lock:
+            ids = list(self.active)
+        if not ids:
+            return
+        with self.router.writer().begin() as conn:
+            conn.execute(
+                text("UPDATE rfq_jobs SET heartbeat_at = now() WHERE id = ANY(:ids) AND worker_id = :w"),
+                {"ids": ids, "w": self.worker_id}
+            )
+
+    def finish(self, job_id, error=None):
+        with self.router.writer().begin() as conn:
+            conn.execute(
+                text("""
+                    UPDATE rfq_jobs SET status = :s, error = :e, updated_at = now()
+                    WHERE id = :id AND worker_id = :w
+                """),
+                {"s": "failed" if error else "done", "e": error, "id": job_id, "w": self.worker_id}
+            )
+            _add_event(conn, job_id, "worker", f"Failed: {error}" if error else "Campaign finished.")
+
+    def _run(self, job):
+        try:
+            run_job(self.router, job)
+            self.finish(job["id"])
+        except Exception as e:
+            log.exception("job %s failed", job["id"])
+            self.finish(job["id"], str(e))
+        finally:
+            with self._lock:
+                self.active.discard(job["id"])
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.heartbeat()
+            except Exception:
+                log.exception("heartbeat failed")
+
+    def serve(self):
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as pool:
+            while not self._stop.is_set():
+                with self._lock:
+                    has_capacity = len(self.active) < self.max_jobs
+                try:
+                    job = self.claim() if has_capacity else None
+                    if job:
+                        with self._lock:
+                            self.active.add(job["id"])
+                        pool.submit(self._run, job)
+                        continue
+                except Exception:
+                    # Geçici DB hatası (havuz zaman aşımı, sunucu yeniden başlatma) worker'ı durdurmasın;
+                    # claim edilip başlatılamayan iş STALE_AFTER sonra tekrar alınır
+                    log.exception("claim failed")
+                self._stop.wait(POLL_INTERVAL)
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_background_worker(router, max_jobs=JOB_WORKERS):
+    """Geliştirme için: worker'ı ayrı süreç yerine bir daemon thread'de başlatır."""
+    worker = JobWorker(router, max_jobs)
+    threading.Thread(target=worker.serve, daemon=True, name="rfq-worker").start()
+    return worker
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "worker":
+        print(__doc__)
+        sys.exit(2)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = JobWorker(create_router("worker"))
+    log.info("worker %s started (max_jobs=%s)", worker.worker_id, worker.max_jobs)
+    try:
+        worker.serve()
+    except KeyboardInterrupt:
+        worker.stop()
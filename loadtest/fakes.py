@@ -0,0 +1,267 @@
+"""
+Yük testi için yerel sahte servisler: OpenAI, web arama (HTTP), SMTP ve IMAP.
+
+Her sunucu ayrı bir daemon thread'de, rastgele boş bir portta çalışır ve her
+isteğe `latency` saniye gecikme ekler. `env()` uygulamanın bu sunuculara
+yönlenmesi için gereken ortam değişkenlerini döner.
+"""
+import json
+import time
+import socketserver
+import threading
+from email.mime.text import MIMEText
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_OFFER_BODY = "Thank you for your request. Our price is {price} USD per unit, delivery {delivery}, payment {terms}."
+FAKE_OFFERS = [
+    ("12.5", "2 weeks", "net 30"),
+    ("9.9", "10-15 days", "100% advance"),
+    ("15", "in stock", "on delivery"),
+    ("11", "1 month", "L/C at sight"),
+    ("13.2", "3 business days", "net 60"),
+]
+
+
+def _completion_for(prompt):
+    """Uygulamadaki prompt'lara göre gerçekçi bir cevap üretir."""
+    if "supplier search request" in prompt:
+        return json.dumps({
+            "buyer_country": "AB", "bidder_country": None, "year_min": 2015, "year_max": 2022,
+            "max_price": 500000, "product_keywords": "gloves",
+        })
+    if "market research assistant" in prompt:
+        return "Estimated price range: 10 - 14 USD per unit"
+    if "extract structured offer details" in prompt:
+        return json.dumps({"price_usd": 12.5, "delivery_time": "2 weeks", "payment_terms": "net 30"})
+    if "preparing text for an email" in prompt:
+        return "100 units of medical gloves"
+    return "Wholesale distributor of medical and laboratory supplies."
+
+
+class _FakeServer:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = None
+
+    def hit(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True, name=type(self).__name__).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------------- HTTP: OpenAI + arama ----------------
+class FakeOpenAI(_FakeServer):
+    """POST /v1/chat/completions; OPENAI_BASE_URL=http://127.0.0.1:<port>/v1"""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                fake.hit()
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = " ".join(m.get("content", "") for m in payload.get("messages", []))
+                body = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": payload.get("model", "gpt-4o-mini"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": _completion_for(prompt)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+
+class FakeSearch(_FakeServer):
+    """GET /search?q=...; sonuç sayfasında bir iletişim e-postası döner."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.hit()
+                body = b"<html><body>Contact us: sales@supplier.example.com</body></html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+
+# ---------------- SMTP ----------------
+class FakeSMTP(_FakeServer):
+    """STARTTLS'siz, AUTH'u her zaman kabul eden minimal SMTP sunucusu."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        fake = self
+        self.messages = 0
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                self.reply("220 fake-smtp ready")
+                in_data = False
+                for raw in self.rfile:
+                    line = raw.decode(errors="replace").rstrip("\r\n")
+                    if in_data:
+                        if line == ".":
+                            in_data = False
+                            fake.hit()
+                            with fake._lock:
+                                fake.messages += 1
+                            self.reply("250 queued")
+                        continue
+                    command = line.split(" ", 1)[0].upper()
+                    if command in ("EHLO", "HELO"):
+                        self.reply("250-fake-smtp")
+                        self.reply("250 AUTH PLAIN LOGIN")
+                    elif command == "AUTH":
+                        self.reply("235 authenticated")
+                    elif command == "DATA":
+                        in_data = True
+                        self.reply("354 end with .")
+                    elif command == "QUIT":
+                        self.reply("221 bye")
+                        return
+                    else:
+                        self.reply("250 ok")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+
+# ---------------- IMAP ----------------
+def _fake_inbox():
+    messages = []
+    for i, (price, delivery, terms) in enumerate(FAKE_OFFERS, 1):
+        msg = MIMEText(FAKE_OFFER_BODY.format(price=price, delivery=delivery, terms=terms))
+        msg["From"] = f"Supplier {i} <sales{i}@example.com>"
+        msg["Subject"] = "Re: Request for Quotation"
+        messages.append(msg.as_bytes())
+    return messages
+
+
+class FakeIMAP(_FakeServer):
+    """imaplib'in kullandığı komutlar için (CAPABILITY, LOGIN, SELECT, SEARCH, FETCH, LOGOUT) düz IMAP."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        fake = self
+        inbox = _fake_inbox()
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                self.reply("* OK IMAP4rev1 fake ready")
+                for raw in self.rfile:
+                    parts = raw.decode(errors="replace").strip().split(" ")
+                    if len(parts) < 2:
+                        continue
+                    tag, command = parts[0], parts[1].upper()
+                    fake.hit()
+                    if command == "CAPABILITY":
+                        self.reply("* CAPABILITY IMAP4rev1 AUTH=PLAIN")
+                    elif command == "SELECT":
+                        self.reply(f"* {len(inbox)} EXISTS")
+                        self.reply("* 0 RECENT")
+                        self.reply(f"{tag} OK [READ-WRITE] SELECT completed")
+                        continue
+                    elif command == "SEARCH":
+                        self.reply("* SEARCH " + " ".join(str(i) for i in range(1, len(inbox) + 1)))
+                    elif command == "FETCH":
+                        num = int(parts[2])
+                        data = inbox[num - 1]
+                        self.wfile.write(f"* {num} FETCH (RFC822 {{{len(data)}}}\r\n".encode() + data + b")\r\n")
+                    elif command == "LOGOUT":
+                        self.reply("* BYE logging out")
+                        self.reply(f"{tag} OK LOGOUT completed")
+                        return
+                    self.reply(f"{tag} OK {command} completed")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+
+class FakeServices:
+    """Tüm sahte servisleri birlikte başlatır/durdurur."""
+
+    def __init__(self, openai_latency=0.0, search_latency=0.0, smtp_latency=0.0, imap_latency=0.0):
+        self.openai = FakeOpenAI(openai_latency)
+        self.search = FakeSearch(search_latency)
+        self.smtp = FakeSMTP(smtp_latency)
+        self.imap = FakeIMAP(imap_latency)
+
+    def start(self):
+        for server in (self.openai, self.search, self.smtp, self.imap):
+            server.start()
+        return self
+
+    def stop(self):
+        for server in (self.openai, self.search, self.smtp, self.imap):
+            server.stop()
+
+    def env(self):
+        return {
+            "OPENAI_API_KEY": "fake-key",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{self.openai.port}/v1",
+            "SEARCH_URL": f"http://127.0.0.1:{self.search.port}/search",
+            "SMTP_HOST": "127.0.0.1",
+            "SMTP_PORT": str(self.smtp.port),
+            "SMTP_STARTTLS": "0",
+            "IMAP_HOST": "127.0.0.1",
+            "IMAP_PORT": str(self.imap.port),
+            "IMAP_SSL": "0",
+            "SENDER_EMAIL": "loadtest@example.com",
+            "SENDER_PASSWORD": "fake",
+        }
+
+    def counts(self):
+        return {
+            "openai": self.openai.requests,
+            "search": self.search.requests,
+            "smtp": self.smtp.messages,
+            "imap": self.imap.requests,
+        }
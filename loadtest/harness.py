@@ -0,0 +1,633 @@
+"""
+Başsız (headless) çoklu oturum yük testi.
+
+Streamlit'in AppTest'i ile her sanal kullanıcı için ayrı bir süreçte bir
+oturum açılır (AppTest süreç genelindeki Runtime'ı değiştirdiği için aynı
+süreçte eşzamanlı çalıştırılamaz); oturumlar giriş yapar, Bidder List'te sayfa gezer, analiz çalıştırır ve
+AI Supplier Finder akışını (RFQ kampanyası + inbox) dener. OpenAI, web arama,
+SMTP ve IMAP yerel sahte sunuculara yönlendirilir; veritabanı .env'deki
+(yerel) Postgres'tir.
+
+    python -m loadtest.harness --setup --seed 200000      # ilk kurulum (boş test DB)
+    python -m loadtest.harness --users 20 --duration 120 --openai-latency 0.4
+
+Rapor: sayfa bazında p50/p95 gecikme, throughput ve pg_stat_activity'den
+örneklenen bağlantı havuzu doluluğu. Ölçümler ana süreçte toplanır; RFQ
+worker'ı, iş takibi ve havuz izleme ana süreçte çalışır.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+import multiprocessing
+from collections import defaultdict
+from loadtest.fakes import FakeServices
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+PASSWORD = "loadtest"
+MONITOR_ROLE = "loadtest-monitor"
+# SQLAlchemy'nin havuz zaman aşımı mesajı: "QueuePool limit of size 5 overflow 5 reached, ..."
+POOL_TIMEOUT_MARKER = "QueuePool limit"
+
+PAGES = {
+    "bidder_list": "📋 Bidder List",
+    "analytics": "📊 Analytics",
+    "supplier_finder": "🤖 AI Supplier Finder",
+}
+ANALYSIS_TYPES = ["Country Comparison (Buyer Country)", "Top Spending Bidders", "Bidder Prices By Country"]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _widget(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"widget not found: {label}")
+
+
+class Recorder:
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, step, seconds, error=None):
+        with self._lock:
+            self.timings[step].append(seconds)
+            if error:
+                self.errors[step].append(error)
+
+    def fail(self, step, error):
+        """Süresi ölçülemeyen hata (ör. çöken oturum süreci); gecikme istatistiklerine girmez."""
+        with self._lock:
+            self.errors[step].append(error)
+
+
+class QueueRecorder:
+    """Oturum süreçlerinde: ölçümleri ana süreçteki Recorder'a kuyruk üzerinden gönderir."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def record(self, step, seconds, error=None):
+        self.events.put(("timing", step, seconds, str(error) if error else None))
+
+    def fail(self, step, error):
+        self.events.put(("error", step, str(error)))
+
+
+# ---------------- SESSIONS ----------------
+class Session:
+    """Tek bir tarayıcı sekmesini taklit eden AppTest oturumu."""
+
+    def __init__(self, username, recorder, timeout, on_job=None):
+        self.username = username
+        self.recorder = recorder
+        self.timeout = timeout
+        self.on_job = on_job
+        self.at = None
+
+    def _timed(self, step, action):
+        start = time.perf_counter()
+        error = None
+        try:
+            action()
+            if self.at.exception:
+                error = self.at.exception[0].value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.record(step, time.perf_counter() - start, error)
+        return error is None
+
+    def run_scenario(self, name):
+        """
+        Senaryodaki widget araması (LookupError) veya süresi ölçülmeyen bir run
+        hata verirse o adıma hata yazılır; sanal kullanıcı çalışmaya devam eder.
+        """
+        try:
+            getattr(self, name)()
+        except Exception as e:
+            self.recorder.fail(name, f"{type(e).__name__}: {e}")
+
+    def login(self):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        self.at.run()
+        _widget(self.at.text_input, "Username").input(self.username)
+        _widget(self.at.text_input, "Password").input(PASSWORD)
+        _widget(self.at.button, "Login").click()
+        return self._timed("login", self.at.run)
+
+    def goto(self, page):
+        _widget(self.at.sidebar.radio, "📂 Pages").set_value(PAGES[page])
+        return self._timed(page, self.at.run)
+
+    def bidder_list(self):
+        if not self.goto("bidder_list"):
+            return
+        _widget(self.at.sidebar.number_input, "Page Number").set_value(random.randint(1, 50))
+        if not self._timed("bidder_list_page", self.at.run):
+            return
+        details = [b for b in self.at.button if b.label == "View Details"]
+        if details:
+            random.choice(details).click()
+            self._timed("tender_details", self.at.run)
+
+    def analytics(self):
+        if not self.goto("analytics"):
+            return
+        _widget(self.at.sidebar.selectbox, "Analysis Type").set_value(random.choice(ANALYSIS_TYPES))
+        _widget(self.at.sidebar.selectbox, "Metric").set_value(random.choice(["Tender Count", "Total Price (USD)"]))
+        self.at.run()
+        _widget(self.at.sidebar.button, "Run Analysis").click()
+        self._timed("analytics_run", self.at.run)
+
+    def supplier_finder(self):
+        if not self.goto("supplier_finder"):
+            return
+        _widget(self.at.text_area, "Describe what kind of supplier you are looking for:").input(
+            "Medical glove suppliers selling to AB between 2015 and 2022")
+        _widget(self.at.text_input, "What product/service is this tender about?").input("100 units of medical gloves")
+        _widget(self.at.button, "🔎 Find Suppliers and Send RFQ").click()
+        if self._timed("rfq_submit", self.at.run) and self.on_job:
+            job_id = self.at.session_state["rfq_job_id"] if "rfq_job_id" in self.at.session_state else None
+            if job_id:
+                self.on_job(job_id, time.time())
+        _widget(self.at.button, "📥 Check Inbox for Offers").click()
+        self._timed("inbox", self.at.run)
+
+
+def virtual_user(index, args, deadline, events):
+    """Oturum sürecinin hedefi: tek AppTest, adımlar sırayla tek thread'de çalışır."""
+    recorder = QueueRecorder(events)
+    # Uygulamanın bu süreçte açtığı havuzlar ilk bağlantıda yakalanıp örneklenir
+    sampler = PoolSampler(
+        f"session-{index}",
+        lambda process, name, checked_out, capacity: events.put(("pool", process, name, checked_out, capacity))
+    ).watch_new_engines().start()
+    try:
+        time.sleep(index * args.ramp_up / max(args.users, 1))
+        session = Session(f"loadtest_user_{index}", recorder, args.timeout,
+                          lambda job_id, submitted: events.put(("job", job_id, submitted)))
+        if not session.login():
+            recorder.fail("session", f"loadtest_user_{index} could not log in")
+            return
+        scenarios = ["bidder_list", "analytics", "supplier_finder"]
+        weights = [args.weight_bidders, args.weight_analytics, args.weight_finder]
+        while time.time() < deadline:
+            session.run_scenario(random.choices(scenarios, weights)[0])
+            time.sleep(random.uniform(0, args.think_time))
+    except Exception as e:
+        recorder.fail("session", f"{type(e).__name__}: {e}")
+    finally:
+        sampler.stop()
+
+
+def collect_events(events, recorder, tracker, pools):
+    """Ana süreçte: oturum süreçlerinden gelen ölçümleri toplar, None ile durur."""
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        if event[0] == "timing":
+            recorder.record(*event[1:])
+        elif event[0] == "error":
+            recorder.fail(*event[1:])
+        elif event[0] == "job":
+            tracker.add(*event[1:])
+        elif event[0] == "pool":
+            pools.add(*event[1:])
+
+
+# ---------------- RFQ JOBS ----------------
+class JobTracker:
+    """
+    Gönderilen kampanyaların uçtan uca (kuyruk + worker) süresini ölçer.
+    Başlangıç zamanları oturum süreçlerinden geldiği için time.time() kullanılır.
+    """
+
+    def __init__(self, engine, recorder, timeout):
+        self.engine = engine
+        self.recorder = recorder
+        self.timeout = timeout
+        self.pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, job_id, started):
+        with self._lock:
+            self.pending[job_id] = started
+
+    def _loop(self):
+        import jobs
+
+        while not self._stop.wait(0.5):
+            with self._lock:
+                items = list(self.pending.items())
+            for job_id, started in items:
+                job = jobs.load_job(self.engine, job_id) or {"status": "missing", "error": "job not found"}
+                elapsed = time.time() - started
+                if job["status"] in ("done", "failed", "missing") or elapsed > self.timeout:
+                    error = None if job["status"] == "done" else (job["error"] or "timeout")
+                    self.recorder.record("rfq_job_e2e", elapsed, error)
+                    with self._lock:
+                        self.pending.pop(job_id, None)
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name="job-tracker").start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def drain(self):
+        """
+        Oturumlar bittikten sonra bekleyen işleri en fazla timeout kadar bekler;
+        aşırı yükte en yavaş olanlar bunlardır. Kalanlar "unfinished" hatası olarak yazılır.
+        """
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not self.pending:
+                    break
+            time.sleep(0.5)
+        self.stop()
+        with self._lock:
+            leftover, self.pending = self.pending, {}
+        for job_id, started in leftover.items():
+            self.recorder.record("rfq_job_e2e", time.time() - started, f"job {job_id} unfinished")
+
+
+# ---------------- CLIENT POOLS ----------------
+def pool_capacity(application_name):
+    """Rol etiketinden havuzun pool_size + max_overflow değeri."""
+    import db
+
+    role = application_name.split(":", 1)[-1]
+    if "replica" in role or role.endswith("primary-read"):
+        return db.DB_READ_POOL_SIZE + db.DB_READ_MAX_OVERFLOW
+    return db.DB_POOL_SIZE + db.DB_MAX_OVERFLOW
+
+
+class PoolSampler:
+    """
+    Bir süreçteki SQLAlchemy havuzlarının doluluğunu (checkedout) örnekler ve
+    sink(process, application_name, checked_out, capacity) ile iletir. Engine'ler
+    ilk bağlantılarında yakalanır; uygulama kodu değişmez.
+    """
+
+    def __init__(self, process, sink, interval=0.2):
+        self.process = process
+        self.sink = sink
+        self.interval = interval
+        self.engines = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _on_connect(self, conn):
+        if conn.engine in self.engines:
+            return
+        try:
+            # psycopg2: sunucunun bildirdiği application_name (ör. tender-dashboard:primary-read)
+            name = conn.connection.dbapi_connection.get_parameter_status("application_name") or ""
+        except Exception:
+            name = str(conn.engine.url.port)
+        if name.endswith(f":{MONITOR_ROLE}"):
+            return
+        with self._lock:
+            self.engines.setdefault(conn.engine, name)
+
+    def watch_new_engines(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "engine_connect", self._on_connect)
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                engines = list(self.engines.items())
+            for engine, name in engines:
+                try:
+                    self.sink(self.process, name, engine.pool.checkedout(), pool_capacity(name))
+                except Exception:
+                    pass
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name="pool-sampler").start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+class PoolStats:
+    """Ana süreçte: havuz örneklerini toplar, rol bazında doluluk raporlar."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, process, name, checked_out, capacity):
+        with self._lock:
+            self.samples[name].append((process, checked_out, capacity))
+
+    def report(self):
+        out = {}
+        for name, samples in sorted(self.samples.items()):
+            checked_out = [c for _, c, _ in samples]
+            saturated = defaultdict(list)
+            for process, c, capacity in samples:
+                saturated[process].append(c >= capacity)
+            out[name] = {
+                "pools": len(saturated),
+                "capacity": samples[0][2],
+                "max_checked_out": max(checked_out),
+                "p95_checked_out": percentile(checked_out, 0.95),
+                # Havuz dolu = yeni bağlantı isteği DB_POOL_TIMEOUT'a kadar bekler
+                "saturated_pct": 100.0 * sum(c >= cap for _, c, cap in samples) / len(samples),
+                "worst_pool_saturated_pct": max(100.0 * sum(v) / len(v) for v in saturated.values()),
+            }
+        return out
+
+
+# ---------------- DB CONNECTIONS ----------------
+class ConnectionMonitor:
+    """
+    Veritabanının gördüğü bağlantıları pg_stat_activity'den application_name
+    etiketiyle örnekler (tüm süreçlerin toplamı); busy = o an sorgu çalıştıran /
+    transaction'da bekleyen bağlantı. Havuz doluluğu için PoolStats'a bakın.
+    """
+
+    def __init__(self, interval=0.2):
+        import db
+
+        self.db = db
+        self.interval = interval
+        self.engines = [
+            db.make_engine(host, port, role=MONITOR_ROLE, pool_size=1, max_overflow=0)
+            for host, port in [(db.DB_HOST, db.DB_PORT)] + db.parse_hosts(db.DB_REPLICA_HOSTS)
+        ]
+        self.samples = defaultdict(list)
+        self._stop = threading.Event()
+
+    def sample(self):
+        from sqlalchemy import text
+
+        for engine in self.engines:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    text("""
+                        SELECT application_name,
+                               count(*) AS connections,
+                               count(*) FILTER (WHERE state <> 'idle') AS busy
+                        FROM pg_stat_activity
+                        WHERE application_name LIKE :prefix AND application_name <> :monitor
+                        GROUP BY application_name
+                    """),
+                    {"prefix": f"{self.db.DB_APP_NAME}:%", "monitor": f"{self.db.DB_APP_NAME}:{MONITOR_ROLE}"}
+                ).all()
+            for name, connections, busy in rows:
+                self.samples[f"{name}@{engine.url.port}"].append((connections, busy))
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                pass
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name="connection-monitor").start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for engine in self.engines:
+            engine.dispose()
+
+    def report(self):
+        out = {}
+        for key, samples in sorted(self.samples.items()):
+            busy = [b for _, b in samples]
+            out[key] = {
+                "max_connections": max(c for c, _ in samples),
+                "max_busy": max(busy),
+                "p95_busy": percentile(busy, 0.95),
+            }
+        return out
+
+
+# ---------------- SETUP ----------------
+def create_users(engine, users):
+    """loadtest_user_0..users-1 hesaplarını oluşturur; var olanlara dokunmaz."""
+    import bcrypt
+    from sqlalchemy import text
+
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO users (username, password_hash, role)
+                VALUES (:u, :p, 'user')
+                ON CONFLICT (username) DO NOTHING
+            """),
+            [{"u": f"loadtest_user_{i}", "p": hashed} for i in range(users)]
+        )
+
+
+def setup_database(users, seed_rows):
+    """Migration'ları uygular, istenirse benchmark verisi basar ve yük testi kullanıcılarını oluşturur."""
+    import migrations
+
+    engine = migrations.get_engine()
+    migrations.upgrade(engine)
+    if seed_rows:
+        migrations.seed_benchmark_data(engine, seed_rows)
+    create_users(engine, users)
+    engine.dispose()
+
+
+# ---------------- REPORT ----------------
+def build_report(recorder, pools, connections, elapsed, fakes):
+    pages = {}
+    total = 0
+    for step in sorted(set(recorder.timings) | set(recorder.errors)):
+        timings = recorder.timings.get(step, [])
+        errors = len(recorder.errors.get(step, []))
+        total += len(timings)
+        pages[step] = {
+            "count": len(timings),
+            "errors": errors,
+            # Senaryo hatası, aynı denemenin ölçülen sayfa geçişinden sonra gelir: deneme sayısı ~ count;
+            # süresi hiç ölçülmeyen adımlarda (session) her hata bir deneme
+            "error_rate": errors / max(len(timings), errors, 1),
+            "p50_ms": percentile(timings, 0.50) * 1000,
+            "p95_ms": percentile(timings, 0.95) * 1000,
+            "max_ms": max(timings, default=float("nan")) * 1000,
+        }
+    pool_timeouts = {
+        step: sum(POOL_TIMEOUT_MARKER in error for error in errors)
+        for step, errors in recorder.errors.items()
+    }
+    return {
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "pages": pages,
+        "pools": pools.report(),
+        "pool_timeouts": {step: n for step, n in pool_timeouts.items() if n},
+        "db_connections": connections.report() if connections else {},
+        "fake_requests": fakes.counts(),
+        "sample_errors": {step: errors[:3] for step, errors in recorder.errors.items()},
+    }
+
+
+def print_report(report):
+    print(f"\nElapsed {report['elapsed_s']:.1f}s, throughput {report['throughput_rps']:.2f} page runs/s\n")
+    print(f"{'step':<18} {'count':>6} {'errors':>6} {'err %':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for step, r in report["pages"].items():
+        print(f"{step:<18} {r['count']:>6} {r['errors']:>6} {100 * r['error_rate']:>6.1f} "
+              f"{r['p50_ms']:>9.0f} {r['p95_ms']:>9.0f} {r['max_ms']:>9.0f}")
+    if report["pools"]:
+        print(f"\n{'client pool':<40} {'pools':>5} {'cap':>4} {'max out':>7} {'p95 out':>7} "
+              f"{'saturated %':>11} {'worst pool %':>12}")
+        for name, r in report["pools"].items():
+            print(f"{name:<40} {r['pools']:>5} {r['capacity']:>4} {r['max_checked_out']:>7} "
+                  f"{r['p95_checked_out']:>7} {r['saturated_pct']:>11.1f} {r['worst_pool_saturated_pct']:>12.1f}")
+    if report["pool_timeouts"]:
+        print(f"Pool timeouts: {report['pool_timeouts']}")
+    if report["db_connections"]:
+        print(f"\n{'db connections':<44} {'max conn':>8} {'max busy':>8} {'p95 busy':>8}")
+        for name, r in report["db_connections"].items():
+            print(f"{name:<44} {r['max_connections']:>8} {r['max_busy']:>8} {r['p95_busy']:>8}")
+    print(f"\nFake service requests: {report['fake_requests']}")
+    for step, errors in report["sample_errors"].items():
+        print(f"  {step}: {errors}")
+
+
+def check_gates(report, fail_p95_ms=None, max_error_rate=0.0):
+    """Regresyon kapısı: ihlal mesajlarını döner, boşsa geçti."""
+    failures = []
+    if report["pages"].get("session", {}).get("errors"):
+        failures.append(f"{report['pages']['session']['errors']} session error(s)")
+    erroring = [step for step, r in report["pages"].items() if r["error_rate"] > max_error_rate]
+    if erroring:
+        failures.append(f"error rate above {100 * max_error_rate:.1f}%: {', '.join(erroring)}")
+    if fail_p95_ms:
+        slow = [step for step, r in report["pages"].items() if r["p95_ms"] > fail_p95_ms]
+        if slow:
+            failures.append(f"p95 above {fail_p95_ms:.0f} ms: {', '.join(slow)}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated sessions")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run after login")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds over which sessions start")
+    parser.add_argument("--think-time", type=float, default=1.0, help="max random pause between scenarios")
+    parser.add_argument("--timeout", type=float, default=60, help="per script run timeout (AppTest)")
+    parser.add_argument("--weight-bidders", type=float, default=3)
+    parser.add_argument("--weight-analytics", type=float, default=2)
+    parser.add_argument("--weight-finder", type=float, default=1)
+    parser.add_argument("--openai-latency", type=float, default=0.3)
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--smtp-latency", type=float, default=0.1)
+    parser.add_argument("--imap-latency", type=float, default=0.05)
+    parser.add_argument("--no-worker", action="store_true", help="RFQ jobs are served by an external worker")
+    parser.add_argument("--setup", action="store_true", help="run migrations and create load test users, then exit")
+    parser.add_argument("--seed", type=int, default=0, help="with --setup: benchmark rows to seed")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--fail-p95-ms", type=float, help="exit 1 if any step's p95 exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="exit 1 if any step's error rate (0-1) exceeds this; session errors always fail")
+    args = parser.parse_args(argv)
+
+    # app.py göreli yollar (style.css) kullanır
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    if args.setup:
+        setup_database(max(args.users, 100), args.seed)
+        print("Load test database ready.")
+        return 0
+
+    fakes = FakeServices(args.openai_latency, args.search_latency, args.smtp_latency, args.imap_latency).start()
+    # rfq/app modülleri import edilmeden önce ayarlanmalı: OpenAI istemcisi ve SMTP ayarları import anında okunur
+    os.environ.update(fakes.env())
+    os.environ["RFQ_EMBEDDED_WORKER"] = "0"
+
+    import db
+    import jobs
+
+    recorder = Recorder()
+    tracker_engine = db.make_engine(role=MONITOR_ROLE, pool_size=1, max_overflow=0)
+    # --users önceki --setup'tan fazla olabilir; eksik hesaplar burada açılır
+    create_users(tracker_engine, args.users)
+    pools = PoolStats()
+    # Ana süreçte sadece worker'ın havuzları açılır (izleme engine'leri hariç tutulur)
+    sampler = PoolSampler("main", pools.add).watch_new_engines().start()
+    worker = None if args.no_worker else jobs.start_background_worker(db.create_router("worker"))
+    tracker = JobTracker(tracker_engine, recorder, args.timeout * 5).start()
+    connections = ConnectionMonitor().start()
+
+    # spawn: süreçler ana sürecin thread'lerini (sahte sunucular, worker) kopyalamaz,
+    # ortam değişkenlerini (sahte servis adresleri) devralır
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    collector = threading.Thread(target=collect_events, args=(events, recorder, tracker, pools), name="collector")
+    collector.start()
+
+    started = time.time()
+    deadline = started + args.ramp_up + args.duration
+    processes = [
+        ctx.Process(target=virtual_user, args=(i, args, deadline, events), name=f"session-{i}")
+        for i in range(args.users)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            recorder.fail("session", f"{process.name} exited with code {process.exitcode}")
+    elapsed = time.time() - started
+    events.put(None)
+    collector.join()
+
+    # Kuyrukta / çalışmakta olan kampanyalar bitene kadar worker açık kalır
+    tracker.drain()
+    if worker:
+        worker.stop()
+    sampler.stop()
+    connections.stop()
+    tracker_engine.dispose()
+    fakes.stop()
+
+    report = build_report(recorder, pools, connections, elapsed, fakes)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    failures = check_gates(report, args.fail_p95_ms, args.max_error_rate)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""
+Versiyonlu şema migration'ları.
+
+Kullanım:
+    python migrations.py upgrade          # tabloları ve index'leri oluşturur
+    python migrations.py status           # uygulanan versiyonları listeler
+    python migrations.py seed [rows]      # benchmark verisi basar (sadece test DB!)
+    python migrations.py verify           # sıcak sorgularda EXPLAIN kontrolü
+"""
+import re
+import sys
+import json
+from sqlalchemy import text
+from db import make_engine, BIDDER_TABLE, TENDER_TABLE
+
+# ---------------- MIGRATIONS ----------------
+# (versiyon, isim, transaction içinde mi, SQL listesi)
+# CREATE INDEX CONCURRENTLY transaction bloğu içinde çalışamaz, bu yüzden
+# index migration'ları AUTOCOMMIT ile tek tek uygulanır.
+MIGRATIONS = [
+    (1, "create_tables", True, [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            username      TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            role          TEXT NOT NULL DEFAULT 'user'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS offers (
+            id             BIGSERIAL PRIMARY KEY,
+            username       TEXT NOT NULL,
+            supplier_name  TEXT,
+            supplier_email TEXT,
+            status         TEXT NOT NULL DEFAULT 'Bekleniyor',
+            price          NUMERIC,
+            delivery       TEXT,
+            terms          TEXT,
+            created_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS {bidder} (
+            id          BIGSERIAL PRIMARY KEY,
+            bidder_name TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS {tender} (
+            id                     BIGSERIAL PRIMARY KEY,
+            bidder_name            TEXT,
+            bidder_country         TEXT,
+            bidder_email           TEXT,
+            bidder_phone           TEXT,
+            bidder_url             TEXT,
+            "bidder_contactName"   TEXT,
+            buyer_country          TEXT,
+            tender_year            INTEGER,
+            tender_title           TEXT,
+            tender_description     TEXT,
+            "tender_finalpriceUsd" NUMERIC
+        )
+        """,
+    ]),
+    (2, "query_indexes", False, [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        # Bidder List: ORDER BY bidder_name LIMIT/OFFSET
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bidder_list_name ON {bidder} (bidder_name)",
+        # load_tender_details: WHERE bidder_name = ? ORDER BY tender_year DESC
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tender_bidder_year ON {tender} (bidder_name, tender_year DESC)",
+        # Eski README index'i yukarıdaki composite index'in öneki, yazmaları boşuna yavaşlatıyor
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_tender_bidder",
+        # find_suppliers: buyer_country + bidder_country + yıl aralığı
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tender_buyer_bidder_year"
+        " ON {tender} (buyer_country, bidder_country, tender_year)",
+        # Country Comparison ve bidder_country filtresi gevşetilmiş find_suppliers
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tender_buyer_year ON {tender} (buyer_country, tender_year)"
+        ' INCLUDE ("tender_finalpriceUsd") WHERE buyer_country IS NOT NULL',
+        # Bidder Prices By Country + ülke listesi
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tender_bidder_country_year"
+        ' ON {tender} (bidder_country, tender_year, bidder_name) INCLUDE ("tender_finalpriceUsd")'
+        " WHERE bidder_country IS NOT NULL",
+        # Top Spending Bidders
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tender_year_bidder ON {tender} (tender_year, bidder_name)"
+        ' INCLUDE ("tender_finalpriceUsd") WHERE bidder_name IS NOT NULL',
+        # find_suppliers: tender_title ILIKE '%...%'
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tender_title_trgm ON {tender} USING gin (tender_title gin_trgm_ops)",
+        # load_offers: WHERE username = ? ORDER BY created_at DESC
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_offers_user_created ON offers (username, created_at DESC)",
+        # Inbox: UPDATE offers ... WHERE username = ? AND supplier_email = ?
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_offers_user_email ON offers (username, supplier_email)",
+    ]),
+    (3, "rfq_jobs", True, [
+        """
+        CREATE TABLE IF NOT EXISTS rfq_jobs (
+            id           BIGSERIAL PRIMARY KEY,
+            username     TEXT NOT NULL,
+            status       TEXT NOT NULL DEFAULT 'queued',
+            params       JSONB NOT NULL,
+            results      JSONB NOT NULL DEFAULT '{{}}',
+            error        TEXT,
+            worker_id    TEXT,
+            heartbeat_at TIMESTAMPTZ,
+            created_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rfq_job_events (
+            id         BIGSERIAL PRIMARY KEY,
+            job_id     BIGINT NOT NULL REFERENCES rfq_jobs (id) ON DELETE CASCADE,
+            stage      TEXT NOT NULL,
+            message    TEXT NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        # Worker kuyruğu: sadece aktif işler
+        "CREATE INDEX IF NOT EXISTS idx_rfq_jobs_active ON rfq_jobs (created_at) WHERE status IN ('queued', 'running')",
+        "CREATE INDEX IF NOT EXISTS idx_rfq_jobs_user_created ON rfq_jobs (username, created_at DESC)",
+        # Sayfanın ilerleme polling'i: WHERE job_id = ? AND id > ?
+        "CREATE INDEX IF NOT EXISTS idx_rfq_job_events_job ON rfq_job_events (job_id, id)",
+        "ALTER TABLE offers ADD COLUMN IF NOT EXISTS job_id BIGINT",
+    ]),
+    (4, "offers_job_index", False, [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_offers_job ON offers (job_id) WHERE job_id IS NOT NULL",
+    ]),
+]
+
+
+def get_engine():
+    # Migration'lar her zaman primary'de ve süre limiti olmadan çalışır (index build uzun sürebilir)
+    return make_engine(role="migrations", pool_size=1, max_overflow=0, statement_timeout_ms=0)
+
+
+def _render(sql):
+    return sql.format(bidder=BIDDER_TABLE, tender=TENDER_TABLE)
+
+
+def ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version    INTEGER PRIMARY KEY,
+                name       TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """))
+
+
+def applied_versions(engine):
+    ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _drop_invalid_index(conn, statement):
+    """
+    Yarıda kalan bir CONCURRENTLY build geride INVALID bir index bırakır ve
+    IF NOT EXISTS onu atlar. Tekrar denemeden önce böyle bir index varsa siler.
+    """
+    match = re.search(r"IF NOT EXISTS (\w+)", statement)
+    if not match:
+        return
+    invalid = conn.execute(
+        text("""
+            SELECT 1 FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """),
+        {"name": match.group(1)}
+    ).first()
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}"))
+
+
+def upgrade(engine, target=None):
+    """Uygulanmamış migration'ları sırayla uygular, uygulanan versiyonları döner."""
+    done = applied_versions(engine)
+    applied = []
+    for version, name, transactional, statements in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        if transactional:
+            with engine.begin() as conn:
+                for statement in statements:
+                    conn.execute(text(_render(statement)))
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                    {"v": version, "n": name}
+                )
+        else:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                for statement in statements:
+                    statement = _render(statement)
+                    if "CONCURRENTLY IF NOT EXISTS" in statement:
+                        _drop_invalid_index(conn, statement)
+                    conn.execute(text(statement))
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                    {"v": version, "n": name}
+                )
+        applied.append(version)
+    return applied
+
+
+# ---------------- BENCHMARK DATA ----------------
+def seed_benchmark_data(engine, rows=500_000):
+    """
+    EXPLAIN kontrolünün anlamlı olması için tablolara gerçekçi dağılımda veri basar.
+    Küçük tablolarda planner haklı olarak Seq Scan seçer; sadece boş bir test DB'de kullanın.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO users (username, password_hash, role)
+            SELECT 'bench_user_' || g, 'x', 'user' FROM generate_series(1, 500) g
+            ON CONFLICT (username) DO NOTHING
+        """))
+        conn.execute(text(f"""
+            INSERT INTO {BIDDER_TABLE} (bidder_name)
+            SELECT 'Bidder ' || g FROM generate_series(1, :n) g
+        """), {"n": max(rows // 25, 1)})
+        conn.execute(text(f"""
+            INSERT INTO {TENDER_TABLE} (
+                bidder_name, bidder_country, bidder_email, bidder_phone, bidder_url, "bidder_contactName",
+                buyer_country, tender_year, tender_title, tender_description, "tender_finalpriceUsd"
+            )
+            SELECT
+                'Bidder ' || (1 + (random() * (:n / 25))::int),
+                c.codes[1 + (random() * 59)::int],
+                'sales' || g || '@example.com',
+                NULL,
+                'https://example.com/' || g,
+                NULL,
+                c.codes[1 + (random() * 59)::int],
+                2000 + (random() * 24)::int,
+                p.products[1 + (random() * 9)::int] || ' ' || md5(g::text),
+                NULL,
+                round((random() * 1000000)::numeric, 2)
+            FROM generate_series(1, :n) g,
+                 (SELECT array_agg(chr(65 + a) || chr(65 + b)) AS codes
+                    FROM generate_series(0, 5) a, generate_series(0, 9) b) c,
+                 (SELECT ARRAY['medical gloves', 'paracetamol', 'office chairs', 'laptops', 'cement',
+                               'diesel fuel', 'school books', 'surgical masks', 'steel pipes',
+                               'printer toner'] AS products) p
+        """), {"n": rows})
+        # RFQ kampanyaları: çoğu bitmiş, küçük bir kısmı kuyrukta/çalışıyor (worker'ın partial index'i)
+        jobs = max(rows // 50, 1)
+        first_job, last_job = conn.execute(text("""
+            WITH inserted AS (
+                INSERT INTO rfq_jobs (username, status, params, results, worker_id, heartbeat_at, created_at, updated_at)
+                SELECT
+                    'bench_user_' || (1 + (random() * 499)::int),
+                    CASE WHEN g % 200 = 0 THEN 'queued' WHEN g % 200 = 1 THEN 'running'
+                         WHEN g % 50 = 2 THEN 'failed' ELSE 'done' END,
+                    jsonb_build_object('user_query', 'bench query ' || g, 'product_info', 'medical gloves'),
+                    jsonb_build_object('market_research', jsonb_build_object('min_price', 10, 'max_price', 14)),
+                    CASE WHEN g % 200 = 1 THEN 'bench-worker' END,
+                    CASE WHEN g % 200 = 1 THEN now() END,
+                    now() - (random() * interval '365 days'),
+                    now()
+                FROM generate_series(1, :n) g
+                RETURNING id
+            )
+            SELECT min(id), max(id) FROM inserted
+        """), {"n": jobs}).one()
+        conn.execute(text("""
+            INSERT INTO rfq_job_events (job_id, stage, message)
+            SELECT j, s.stage, s.stage || ' finished.'
+            FROM generate_series(CAST(:first AS bigint), CAST(:last AS bigint)) j,
+                 unnest(ARRAY['queued', 'market_research', 'filters', 'tender_summary',
+                              'suppliers', 'send_rfq', 'enrich', 'save_offers']) AS s(stage)
+        """), {"first": first_job, "last": last_job})
+        conn.execute(text("""
+            INSERT INTO offers (username, supplier_name, supplier_email, status, price, delivery, terms, created_at, job_id)
+            SELECT
+                'bench_user_' || (1 + (random() * 499)::int),
+                'Bidder ' || g,
+                'sales' || g || '@example.com',
+                'Bekleniyor',
+                NULL, NULL, NULL,
+                now() - (random() * interval '365 days'),
+                :first + (random() * (:last - :first))::bigint
+            FROM generate_series(1, :n) g
+        """), {"n": max(rows // 5, 1), "first": first_job, "last": last_job})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in (BIDDER_TABLE, TENDER_TABLE, "offers", "users", "rfq_jobs", "rfq_job_events"):
+            conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+
+# ---------------- EXPLAIN VERIFICATION ----------------
+# app.py içindeki seçici sıcak sorgular. Tüm tabloyu gruplayan analitik
+# sorgular (Country Comparison, Top Spending) bilerek dışarıda: onlarda
+# Seq Scan planner için meşru bir seçim olabilir.
+HOT_QUERIES = [
+    ("bidder_list_page",
+     "SELECT bidder_name FROM {bidder} ORDER BY bidder_name LIMIT :limit OFFSET :offset",
+     {"limit": 20, "offset": 0}),
+    ("tender_details",
+     "SELECT * FROM {tender} WHERE bidder_name = :bname ORDER BY tender_year DESC",
+     {"bname": "Bidder 42"}),
+    ("bidder_prices_by_country",
+     'SELECT tender_year, bidder_country, bidder_name, SUM("tender_finalpriceUsd") AS total_price'
+     " FROM {tender} WHERE bidder_country = :selected_country"
+     " GROUP BY tender_year, bidder_country, bidder_name ORDER BY tender_year",
+     {"selected_country": "AB"}),
+    ("analytics_drilldown_buyer",
+     "SELECT tender_year, bidder_name, COUNT(*) AS tender_count FROM {tender}"
+     " WHERE buyer_country IS NOT NULL AND buyer_country = :drill AND bidder_name IS NOT NULL"
+     " GROUP BY tender_year, bidder_name",
+     {"drill": "AB"}),
+    ("find_suppliers_exact",
+     'SELECT bidder_name, COUNT(*) AS tender_count, AVG("tender_finalpriceUsd") AS avg_price'
+     " FROM {tender} WHERE buyer_country = :buyer_country AND bidder_country = :bidder_country"
+     ' AND tender_year >= :ymin AND tender_year <= :ymax AND "tender_finalpriceUsd" <= :max_price'
+     " AND tender_title ILIKE :keywords"
+     " GROUP BY bidder_name ORDER BY tender_count DESC LIMIT 10",
+     {"buyer_country": "AB", "bidder_country": "CD", "ymin": 2015, "ymax": 2020,
+      "max_price": 50000, "keywords": "%gloves%"}),
+    ("find_suppliers_buyer_years",
+     'SELECT bidder_name, COUNT(*) AS tender_count, AVG("tender_finalpriceUsd") AS avg_price'
+     " FROM {tender} WHERE buyer_country = :buyer_country AND tender_year >= :ymin AND tender_year <= :ymax"
+     " GROUP BY bidder_name ORDER BY tender_count DESC LIMIT 10",
+     {"buyer_country": "AB", "ymin": 2018, "ymax": 2019}),
+    ("find_suppliers_keywords",
+     'SELECT bidder_name, COUNT(*) AS tender_count, AVG("tender_finalpriceUsd") AS avg_price'
+     " FROM {tender} WHERE tender_title ILIKE :keywords"
+     " GROUP BY bidder_name ORDER BY tender_count DESC LIMIT 10",
+     {"keywords": "%3f9a1%"}),
+    # offer_scoring.load_offers_for_scoring (teklif tablosu)
+    ("load_offers_for_scoring",
+     "SELECT o.id, o.job_id, o.supplier_name, o.supplier_email, o.status,"
+     " o.price, o.delivery, o.terms, o.created_at,"
+     " CAST(j.results #>> '{{market_research,min_price}}' AS float) AS band_min,"
+     " CAST(j.results #>> '{{market_research,max_price}}' AS float) AS band_max"
+     " FROM offers o LEFT JOIN rfq_jobs j ON j.id = o.job_id"
+     " WHERE o.username = :u ORDER BY o.created_at DESC",
+     {"u": "bench_user_7"}),
+    # RFQ kampanyası sayfası her 2 sn'de bir (st.fragment) ve worker
+    ("rfq_load_job",
+     "SELECT id, username, status, params, results, error, created_at, updated_at FROM rfq_jobs WHERE id = :id",
+     {"id": 42}),
+    ("rfq_latest_job_id",
+     "SELECT id FROM rfq_jobs WHERE username = :u ORDER BY created_at DESC LIMIT 1",
+     {"u": "bench_user_7"}),
+    ("rfq_load_events",
+     "SELECT id, stage, message, created_at FROM rfq_job_events WHERE job_id = :id AND id > :after ORDER BY id",
+     {"id": 42, "after": 0}),
+    ("rfq_claim_job",
+     "UPDATE rfq_jobs SET status = 'running', worker_id = :w, heartbeat_at = now(), updated_at = now()"
+     " WHERE id = (SELECT id FROM rfq_jobs"
+     " WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale))"
+     " ORDER BY created_at FOR UPDATE SKIP LOCKED LIMIT 1)"
+     " RETURNING id, username, params, results",
+     {"w": "verify", "stale": 60}),
+    ("inbox_update_offer",
+     "UPDATE offers SET price = :p, delivery = :d, terms = :t, status = 'Teklif Geldi'"
+     " WHERE username = :u AND supplier_email = :e",
+     {"p": 1, "d": "2 weeks", "t": "net 30", "u": "bench_user_7", "e": "sales42@example.com"}),
+    ("accept_offer",
+     "UPDATE offers SET status = 'Kabul Edildi ✅' WHERE id = :id",
+     {"id": 42}),
+]
+
+
+class PlanCheckError(RuntimeError):
+    pass
+
+
+def _seq_scans(plan):
+    """Plan ağacındaki Seq Scan yapılan tabloları döner."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def explain(conn, sql, params):
+    raw = conn.execute(text("EXPLAIN (FORMAT JSON) " + _render(sql)), params).scalar()
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    return raw[0]["Plan"]
+
+
+def verify_query_plans(engine, queries=HOT_QUERIES):
+    """
+    Her sıcak sorgunun planını alır; herhangi biri Seq Scan'e düşerse
+    PlanCheckError fırlatır. Anlamlı sonuç için önce seed_benchmark_data çalıştırın.
+    """
+    failures = {}
+    with engine.connect() as conn:
+        for name, sql, params in queries:
+            scans = _seq_scans(explain(conn, sql, params))
+            if scans:
+                failures[name] = scans
+    if failures:
+        details = ", ".join(f"{name} -> {tables}" for name, tables in failures.items())
+        raise PlanCheckError(f"Sequential scan in hot queries: {details}")
+    return True
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    engine = get_engine()
+
+    if command == "upgrade":
+        applied = upgrade(engine)
+        print(f"Applied migrations: {applied or 'none (up to date)'}")
+    elif command == "status":
+        done = applied_versions(engine)
+        for version, name, _, _ in MIGRATIONS:
+            print(f"{version:>3} {name:<20} {'applied' if version in done else 'pending'}")
+    elif command == "seed":
+        rows = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+        seed_benchmark_data(engine, rows)
+        print(f"Seeded {rows} tender rows.")
+    elif command == "verify":
+        try:
+            verify_query_plans(engine)
+        except PlanCheckError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print("✅ All hot queries use index scans.")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,211 @@
+"""
+Teklif puanlama ve sıralama.
+
+Bir kullanıcının tüm teklifleri tek seferde, satır satır döngü olmadan
+pandas/NumPy vektör işlemleriyle puanlanır:
+    - fiyat: kampanyanın piyasa bandına (yoksa kampanyadaki en ucuz teklife) göre
+    - teslim süresi: "2 weeks", "10-15 days", "in stock" gibi metinlerden gün sayısı
+    - ödeme şartları: peşin / akreditif / teslimde ödeme / net N gün
+    - geçmiş: tedarikçinin tender_data'daki ihale sayısı
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from db import TENDER_TABLE
+
+DEFAULT_WEIGHTS = {"price": 0.45, "delivery": 0.25, "terms": 0.15, "track": 0.15}
+
+# 30 günlük teslim süresi 0.5 puan alır
+DELIVERY_HALF_LIFE_DAYS = 30
+UNIT_DAYS = {"day": 1, "business day": 1.4, "week": 7, "month": 30}
+
+DELIVERY_PATTERN = (
+    r"(?P<low>\d+(?:\.\d+)?)\s*(?:(?:-|–|to)\s*(?P<high>\d+(?:\.\d+)?))?\s*"
+    r"(?P<unit>business day|day|week|month)"
+)
+# Kelime sınırları: "already", "ready in 6 weeks" içindeki "ready" gibi eşleşmeler süreyi ezmesin
+IMMEDIATE_PATTERN = r"(?<!not )\b(?:immediate(?:ly)?|in stock|from stock|same day|ready)\b"
+NET_DAYS_PATTERN = r"net\s*(\d+)|(\d+)\s*days?\s*(?:after|from)"
+ADVANCE_PATTERN = r"advance|prepay|prepaid|upfront|up-front|100\s*%\s*(?:before|in advance)|cash in advance"
+LC_PATTERN = r"letter of credit|\bl/?c\b"
+ON_DELIVERY_PATTERN = r"on delivery|after delivery|upon delivery|\bcod\b|cash against documents"
+
+SCORED_COLUMNS = [
+    "rank", "supplier_name", "supplier_email", "status", "price", "delivery", "delivery_days",
+    "terms", "tender_count", "price_score", "delivery_score", "terms_score", "track_score", "score",
+]
+
+
+def _unique_apply(series, parse):
+    """
+    Teslim/ödeme metinleri çok tekrar eder; regex'i sadece benzersiz
+    değerlerde çalıştırıp sonucu kodlarla geri yayar.
+    """
+    codes, uniques = pd.factorize(series, sort=False)
+    # Boş değerler -1 kodunu alır; "" olarak sona eklenip parsed[-1] ile eşlenir
+    texts = pd.Series(np.append(np.asarray(uniques, dtype=object), ""), dtype="object").str.lower()
+    parsed = np.asarray(parse(texts), dtype=float)
+    return parsed[codes]
+
+
+def _parse_delivery(texts):
+    parts = texts.str.extract(DELIVERY_PATTERN)
+    amount = pd.to_numeric(parts["high"].fillna(parts["low"]), errors="coerce")
+    unit = parts["unit"].map(UNIT_DAYS)
+    days = np.array(amount * unit, dtype=float)
+    # "Hemen" ifadeleri sadece metinde süre yoksa 0 gün sayılır
+    immediate = texts.str.contains(IMMEDIATE_PATTERN, regex=True).to_numpy()
+    days[np.isnan(days) & immediate] = 0.0
+    return days
+
+
+def _parse_terms(texts):
+    net = texts.str.extract(NET_DAYS_PATTERN)
+    net_days = pd.to_numeric(net[0].fillna(net[1]), errors="coerce").to_numpy(dtype=float)
+    present = (texts != "").to_numpy()
+    return np.select(
+        [
+            texts.str.contains(ADVANCE_PATTERN, regex=True).to_numpy(),
+            ~np.isnan(net_days),
+            texts.str.contains(ON_DELIVERY_PATTERN, regex=True).to_numpy(),
+            texts.str.contains(LC_PATTERN, regex=True).to_numpy(),
+            present,
+        ],
+        [
+            0.1,
+            0.6 + 0.4 * np.clip(np.nan_to_num(net_days) / 90, 0, 1),
+            0.8,
+            0.6,
+            0.5,
+        ],
+        default=0.0,
+    )
+
+
+def parse_delivery_days(series):
+    """Teslim süresi metnini gün sayısına çevirir, anlaşılamayanlar NaN."""
+    return _unique_apply(series, _parse_delivery)
+
+
+def score_payment_terms(series):
+    """Ödeme şartlarını 0-1 arası puanlar; alıcı için vade ne kadar uzunsa o kadar iyi."""
+    return _unique_apply(series, _parse_terms)
+
+
+def score_offers(offers, track_record=None, weights=None):
+    """
+    offers: en az supplier_name, price, delivery, terms kolonları; opsiyonel
+    job_id, band_min, band_max. track_record: bidder_name, tender_count.
+    Puan ve kampanya içi sıra kolonları eklenmiş yeni bir DataFrame döner.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    df = offers.copy()
+    n = len(df)
+    if "job_id" not in df:
+        df["job_id"] = np.nan
+    for col in ("band_min", "band_max"):
+        if col not in df:
+            df[col] = np.nan
+    campaign = df["job_id"].fillna(-1)
+
+    # ---- Fiyat ----
+    price = pd.to_numeric(df["price"], errors="coerce").to_numpy(dtype=float, copy=True)
+    # 0 veya negatif fiyat (AI çıkarımında olası) eksik sayılır; yoksa kampanyanın "en ucuzu" 0 olur
+    price[price <= 0] = np.nan
+    band_min = pd.to_numeric(df["band_min"], errors="coerce").to_numpy(dtype=float)
+    band_max = pd.to_numeric(df["band_max"], errors="coerce").to_numpy(dtype=float)
+    width = band_max - band_min
+    has_band = ~np.isnan(width) & (width > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Bant altı 1, bant üstü 0, arası doğrusal
+        band_score = np.clip((band_max - price) / np.where(has_band, width, np.nan), 0, 1)
+        cheapest = pd.Series(price).groupby(campaign.to_numpy()).transform("min").to_numpy()
+        relative_score = np.clip(cheapest / price, 0, 1)
+    price_score = np.where(has_band, band_score, relative_score)
+    df["price_score"] = np.nan_to_num(price_score)
+
+    # ---- Teslim süresi ----
+    df["delivery_days"] = parse_delivery_days(df["delivery"])
+    df["delivery_score"] = np.nan_to_num(1.0 / (1.0 + df["delivery_days"].to_numpy() / DELIVERY_HALF_LIFE_DAYS))
+
+    # ---- Ödeme şartları ----
+    df["terms_score"] = score_payment_terms(df["terms"])
+
+    # ---- Geçmiş ----
+    if track_record is not None and not track_record.empty:
+        counts = track_record.set_index("bidder_name")["tender_count"]
+        df["tender_count"] = df["supplier_name"].map(counts).fillna(0).to_numpy(dtype=float)
+    else:
+        df["tender_count"] = np.zeros(n)
+    top = df["tender_count"].max() if n else 0
+    df["track_score"] = np.log1p(df["tender_count"]) / np.log1p(top) if top > 0 else 0.0
+
+    # ---- Toplam ----
+    total = sum(weights.values())
+    score = (
+        weights["price"] * df["price_score"]
+        + weights["delivery"] * df["delivery_score"]
+        + weights["terms"] * df["terms_score"]
+        + weights["track"] * df["track_score"]
+    ) / total
+    # Fiyatı gelmemiş teklif sıralanmaz
+    df["score"] = score.where(~np.isnan(price))
+    df["rank"] = df["score"].groupby(campaign).rank(ascending=False, method="min")
+    return df
+
+
+def ranked_view(scored):
+    """UI için: en yeni kampanya önce, kampanya içinde sıraya göre; kolonlar sadeleştirilmiş."""
+    cols = [c for c in ["job_id"] + SCORED_COLUMNS + ["id"] if c in scored]
+    # Çok kolonlu sort_values yerine sayısal dizilerde lexsort: büyük tablolarda belirgin şekilde hızlı
+    order = np.lexsort((
+        scored["rank"].fillna(np.inf).to_numpy(),
+        # Kampanya id'leri artan sırada; eksiyle en yeni kampanya başa, kampanyasız teklifler sona
+        -scored["job_id"].fillna(-np.inf).to_numpy(dtype=float),
+    ))
+    return scored[cols].iloc[order].reset_index(drop=True)
+
+
+# ---------------- DB ----------------
+def load_offers_for_scoring(engine, username):
+    """Kullanıcının teklifleri ve her birinin kampanyasına ait piyasa bandı."""
+    with engine.connect() as conn:
+        return pd.read_sql(
+            text("""
+                SELECT o.id, o.job_id, o.supplier_name, o.supplier_email, o.status,
+                       o.price, o.delivery, o.terms, o.created_at,
+                       CAST(j.results #>> '{market_research,min_price}' AS float) AS band_min,
+                       CAST(j.results #>> '{market_research,max_price}' AS float) AS band_max
+                FROM offers o
+                LEFT JOIN rfq_jobs j ON j.id = o.job_id
+                WHERE o.username = :u
+                ORDER BY o.created_at DESC
+            """),
+            conn,
+            params={"u": username}
+        )
+
+
+def load_track_record(engine, supplier_names):
+    names = sorted({n for n in supplier_names if n})
+    if not names:
+        return pd.DataFrame(columns=["bidder_name", "tender_count"])
+    with engine.connect() as conn:
+        return pd.read_sql(
+            text(f"""
+                SELECT bidder_name, COUNT(*) AS tender_count
+                FROM {TENDER_TABLE}
+                WHERE bidder_name = ANY(:names)
+                GROUP BY bidder_name
+            """),
+            conn,
+            params={"names": names}
+        )
+
+
+def rank_user_offers(router, username, weights=None):
+    offers = load_offers_for_scoring(router.writer(), username)
+    if offers.empty:
+        return offers
+    track = load_track_record(router.reader(), offers["supplier_name"])
+    return ranked_view(score_offers(offers, track, weights))
@@ -0,0 +1,275 @@
+"""
+RFQ pipeline adımları: piyasa araştırması, filtre çıkarma, tedarikçi arama,
+e-posta gönderme ve tedarikçi zenginleştirme.
+
+Streamlit'e bağımlı değildir; hem app.py hem de jobs.py worker'ı kullanır.
+"""
+import os
+import re
+import json
+import smtplib
+import requests
+import pandas as pd
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+from openai import OpenAI
+from sqlalchemy import text
+from db import TENDER_TABLE
+
+load_dotenv()
+
+# ---------------- OPENAI SETTINGS ----------------
+# OPENAI_BASE_URL tanımlıysa OpenAI istemcisi onu kullanır (yük testindeki sahte sunucu gibi)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# ---------------- MAIL / SEARCH SETTINGS ----------------
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com").strip()
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SEARCH_URL = os.getenv("SEARCH_URL", "https://www.google.com/search").strip()
+
+
+def ai_extract_filters(query_text):
+    prompt = f"""
+    Analyze the user's supplier search request and output JSON with:
+    - buyer_country: 2-letter ISO code or null
+    - bidder_country: 2-letter ISO code or null
+    - year_min: integer or null
+    - year_max: integer or null
+    - max_price: number in USD or null
+    - product_keywords: keywords for tender_title
+
+    Only output valid JSON. No explanations.
+
+    Query: "{query_text}"
+    """
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0
+    )
+    raw_text = response.choices[0].message.content.strip()
+    json_match = re.search(r"\{.*\}", raw_text, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON found in AI output")
+    return json.loads(json_match.group(0))
+
+
+def find_suppliers(filters, engine, notify=None):
+    """
+    Filtrelere uyan tedarikçileri arar; sonuç yoksa filtreleri sırayla gevşetir.
+    notify: her gevşetme adımında çağrılan mesaj fonksiyonu (opsiyonel).
+    """
+    notify = notify or (lambda message: None)
+
+    def run_query(use_keywords=True, use_maxprice=True, use_bidder_country=True, use_years=True):
+        where_clauses, params = [], {}
+
+        if filters.get("buyer_country"):
+            where_clauses.append("buyer_country = :buyer_country")
+            params["buyer_country"] = filters["buyer_country"]
+
+        if use_bidder_country and filters.get("bidder_country"):
+            where_clauses.append("bidder_country = :bidder_country")
+            params["bidder_country"] = filters["bidder_country"]
+
+        if use_years and filters.get("year_min"):
+            where_clauses.append("tender_year >= :ymin")
+            params["ymin"] = filters["year_min"]
+        if use_years and filters.get("year_max"):
+            where_clauses.append("tender_year <= :ymax")
+            params["ymax"] = filters["year_max"]
+
+        if use_maxprice and filters.get("max_price"):
+            where_clauses.append('"tender_finalpriceUsd" <= :max_price')
+            params["max_price"] = filters["max_price"]
+
+        if use_keywords and filters.get("product_keywords"):
+            where_clauses.append("tender_title ILIKE :keywords")
+            params["keywords"] = f"%{filters['product_keywords']}%"
+
+        where_sql = " AND ".join(where_clauses)
+        if where_sql:
+            where_sql = "WHERE " + where_sql
+
+        query = f"""
+            SELECT
+                bidder_name,
+                bidder_country,
+                bidder_email,
+                bidder_phone,
+                bidder_url,
+                "bidder_contactName",
+                COUNT(*) AS tender_count,
+                AVG("tender_finalpriceUsd") AS avg_price
+            FROM {TENDER_TABLE}
+            {where_sql}
+            GROUP BY bidder_name, bidder_country, bidder_email, bidder_phone, bidder_url, "bidder_contactName"
+            ORDER BY tender_count DESC
+            LIMIT 10;
+        """
+        with engine.connect() as conn:
+            return pd.read_sql(text(query), conn, params=params)
+
+    # 🔹 Fallback zinciri
+    df = run_query(True, True, True, True)
+    if not df.empty:
+        return df
+    notify("No exact match. Relaxing keyword filter...")
+    df = run_query(False, True, True, True)
+    if not df.empty:
+        return df
+    notify("Still no match. Ignoring max price...")
+    df = run_query(False, False, True, True)
+    if not df.empty:
+        return df
+    notify("Still no match. Allowing foreign suppliers...")
+    df = run_query(False, False, False, True)
+    if not df.empty:
+        return df
+    notify("Still no match. Removing year restriction...")
+    return run_query(False, False, False, False)
+
+
+def summarize_industry(bidder_name, bidder_url=None):
+    """AI ile şirketin sektörünü / faaliyetini özetler"""
+    query_text = f"Company name: {bidder_name}. "
+    if bidder_url:
+        query_text += f"Website: {bidder_url}. "
+    query_text += "Please summarize briefly which industry this company operates in and what it does."
+
+    try:
+        resp = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": query_text}],
+            temperature=0.2
+        )
+        return resp.choices[0].message.content.strip()
+    except Exception:
+        return "Industry information not available."
+
+
+def send_email_smtp(to_emails, subject, body):
+    sender_email = os.getenv("SENDER_EMAIL")
+    sender_password = os.getenv("SENDER_PASSWORD")
+
+    msg = MIMEMultipart()
+    msg["From"] = sender_email
+    msg["To"] = ",".join(to_emails)
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "plain"))
+
+    try:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)  # Outlook için: smtp.office365.com
+        if SMTP_STARTTLS:
+            server.starttls()
+        server.login(sender_email, sender_password)
+        server.sendmail(sender_email, to_emails, msg.as_string())
+        server.quit()
+        return True
+    except Exception as e:
+        return str(e)
+
+
+def analyze_tender_about(text):
+    """
+    Kullanıcı tarafından girilen ürün/hizmet bilgisini özetleyip
+    e-mail konusu için kısa bir ifade üretir.
+    """
+    prompt = f"""
+    You are preparing text for an email about a tender.
+    Rules:
+    - Translate to English if needed (e.g., if Turkish).
+    - Give a short phrase (max 10 words).
+    - Include quantity if mentioned (e.g., "100 units of Parol medicine").
+    - Do NOT explain, only return the phrase to be used directly in the email.
+
+    Tender about: "{text}"
+    """
+    try:
+        resp = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0
+        )
+        return resp.choices[0].message.content.strip()
+    except Exception:
+        return text
+
+
+def market_research(product_info, quantity=None):
+    """
+    AI destekli piyasa araştırması yapar.
+    - product_info: ürün açıklaması
+    - quantity: adet bilgisi (opsiyonel)
+    Çıktı: fiyat aralığı metin olarak
+    """
+    prompt = f"""
+    You are a market research assistant.
+    Estimate the typical wholesale price range in USD for the following product.
+    Consider international suppliers and bulk purchase scenarios.
+    If quantity is provided, scale the estimation accordingly.
+    Provide result as: "Estimated price range: X - Y USD per unit"
+    Product: {product_info}
+    Quantity: {quantity if quantity else "N/A"}
+    """
+    try:
+        resp = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0
+        )
+        return resp.choices[0].message.content.strip()
+    except Exception as e:
+        return f"Market research failed: {e}"
+
+
+# 🔹 Market research parse fonksiyonu
+def parse_price_band(summary_text):
+    match = re.search(r"(\d+\.?\d*)\s*-\s*(\d+\.?\d*)", summary_text)
+    if match:
+        return float(match.group(1)), float(match.group(2))
+    return None, None
+
+
+def lookup_company_email(company_name, website=None):
+    """
+    Şirket adı veya web sitesiyle internetten resmi iletişim e-postasını bulur.
+    Öncelik: sales@, info@, contact@ gibi adresler.
+    """
+    query = f"{company_name} contact email"
+    if website:
+        query += f" site:{website}"
+
+    try:
+        resp = requests.get(SEARCH_URL, params={"q": query}, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        soup = BeautifulSoup(resp.text, "html.parser")
+        text = soup.get_text()
+
+        emails = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
+        if emails:
+            for pref in ["sales@", "info@", "contact@", "office@", "support@"]:
+                for e in emails:
+                    if pref in e.lower():
+                        return e
+            return emails[0]
+        else:
+            return None
+    except Exception:
+        return None
+
+
+def build_rfq_email(tender_summary, contact_identity):
+    subject = f"Request for Quotation - {tender_summary}"
+    body = (
+        f"Dear Supplier,\n\n"
+        f"We are currently evaluating suppliers for {tender_summary}.\n"
+        f"Could you please provide us with your best offer including:\n"
+        f"- Price per unit\n"
+        f"- Delivery time\n"
+        f"- Payment terms\n\n"
+        f"Best regards,\n{contact_identity}"
+    )
+    return subject, body
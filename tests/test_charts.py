@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+import charts
+
+
+def series(lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = [
+        pd.DataFrame({"x": np.arange(n), "s": name, "v": rng.normal(size=n)})
+        for name, n in lengths.items()
+    ]
+    # Karışık sıra: downsample seri içi x sırasını kendisi kurmalı
+    return pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def test_downsample_limits_points_and_keeps_order():
+    df = series({"dense": 5000, "medium": 401, "short": 50})
+    out = charts.downsample(df, "x", "s", "v", max_points=100)
+    sizes = out.groupby("s").size()
+    assert sizes.max() <= 100
+    assert sizes["short"] == 50
+    for _, group in out.groupby("s"):
+        assert group["x"].is_monotonic_increasing
+
+
+def test_downsample_keeps_ends_and_bucket_extremes():
+    max_points = 100
+    df = series({"dense": 5000})
+    out = charts.downsample(df, "x", "s", "v", max_points=max_points)
+    kept = set(out["x"])
+    assert {0, 4999} <= kept
+
+    ordered = df.sort_values("x")
+    buckets = (max_points - 2) // 2
+    bucket = np.arange(len(ordered)) * buckets // len(ordered)
+    for _, group in ordered.groupby(bucket):
+        assert group.loc[group["v"].idxmin(), "x"] in kept
+        assert group.loc[group["v"].idxmax(), "x"] in kept
+
+
+def test_downsample_handles_missing_series_label():
+    df = series({"a": 300})
+    df.loc[df.index[:100], "s"] = None
+    out = charts.downsample(df, "x", "s", "v", max_points=50)
+    assert out["s"].isna().sum() <= 50
+
+
+def test_line_chart_labels_missing_series():
+    df = pd.DataFrame({"x": [1, 2, 1, 2], "s": ["a", "a", None, None], "v": [1, 2, 3, 4]})
+    fig = charts.line_chart(df, "x", "v", "s")
+    assert sorted(trace.name for trace in fig.data) == ["(none)", "a"]
+
+
+@pytest.fixture
+def tender_db():
+    engine = create_engine("sqlite://")
+    rows = [
+        {"year": year, "country": country, "amount": amount}
+        for year in (2020, 2021)
+        for country, amount in [("AA", 50), ("BB", 30), ("CC", 5), ("DD", 3)]
+    ]
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (year INTEGER, country TEXT, amount REAL)"))
+        conn.execute(text("INSERT INTO t VALUES (:year, :country, :amount)"), rows)
+    return engine
+
+
+def test_top_n_sql_folds_the_rest_into_other(tender_db):
+    sql = charts.top_n_sql(
+        "SELECT year, country, SUM(amount) AS amount FROM t GROUP BY year, country",
+        "year", "country", "amount"
+    )
+    with tender_db.connect() as conn:
+        df = pd.read_sql(text(sql), conn, params={"top_n": 2})
+    assert sorted(df["country"].unique()) == ["AA", "BB", charts.OTHER_LABEL]
+    assert len(df) == 6
+    other = df[df["country"] == charts.OTHER_LABEL].set_index("year")["amount"]
+    assert other.to_dict() == {2020: 8, 2021: 8}
+    assert df["year"].is_monotonic_increasing
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from offer_scoring import parse_delivery_days, ranked_view, score_offers
+
+
+def test_delivery_duration_wins_over_immediate_words():
+    days = parse_delivery_days(pd.Series([
+        "ready in 6 weeks",
+        "already available in 10 days",
+        "not in stock, 4 weeks",
+        "10-15 days",
+    ]))
+    assert days.tolist() == [42, 10, 28, 15]
+
+
+def test_delivery_immediate_without_duration():
+    days = parse_delivery_days(pd.Series(["in stock", "Ready", "immediately", "not in stock", None]))
+    assert days[:3].tolist() == [0, 0, 0]
+    assert np.isnan(days[3:]).all()
+
+
+def test_ranked_view_newest_campaign_first():
+    offers = pd.DataFrame({
+        "job_id": [1, 2, None, 2],
+        "supplier_name": ["a", "b", "c", "d"],
+        "price": [1.0, 2.0, 3.0, 1.0],
+        "delivery": ["1 week"] * 4,
+        "terms": ["net 30"] * 4,
+    })
+    view = ranked_view(score_offers(offers))
+    assert view["supplier_name"].tolist() == ["d", "b", "a", "c"]
+
+
+def test_zero_price_is_treated_as_missing():
+    offers = pd.DataFrame({
+        "job_id": [1, 1],
+        "supplier_name": ["a", "b"],
+        "price": [10.5, 0.0],
+        "delivery": ["1 week"] * 2,
+        "terms": ["net 30"] * 2,
+    })
+    scored = score_offers(offers)
+    assert scored["price_score"].tolist() == [1.0, 0.0]
+    assert scored["rank"].iloc[0] == 1
+    assert np.isnan(scored["score"].iloc[1])